@@ -1,41 +1,88 @@
 # app.py - Main Flask application
 
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, session, stream_with_context
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, session, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_migrate import Migrate
 from flask_bootstrap import Bootstrap
 from flask_mail import Mail, Message
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy.exc import IntegrityError
 import json
 import re
-import traceback # Import traceback for detailed error logging
-from simple_salesforce import Salesforce
-from hubspot import HubSpot
-from hubspot.crm.contacts import SimplePublicObjectInput
-import tweepy
-from instagrapi import Client
-import google.generativeai as genai
+import atexit
+import logging
+import logging.handlers
 from config import config
-from models import db, Lead, LeadManager, User, LeadNote, EmailLog, ChatMessage, APIKey
-from forms import LeadForm, SearchForm, BulkActionForm, ImportForm, EngagementCalculatorForm, RegistrationForm, LoginForm, ProfileForm, NoteForm, UserSearchForm, GeminiLeadGenerationForm, ScrapeLeadsForm
+from models import db, cache, Lead, LeadManager, User, LeadNote, EmailLog, ChatMessage, APIKey, verify_password, password_needs_rehash, DUMMY_PASSWORD_HASH
+from forms import LeadForm, SearchForm, BulkActionForm, ImportForm, EngagementCalculatorForm, LeadAPIForm, LeadUpdateAPIForm, BulkDeleteAPIForm, RegistrationForm, LoginForm, ProfileForm, NoteForm, UserSearchForm, GeminiLeadGenerationForm, ScrapeLeadsForm
 from utils import (
-    export_leads_to_csv, export_leads_to_json, parse_csv_file, parse_json_file,
-    create_response, require_api_key, require_rate_limit, allowed_file,
-    format_number, format_percentage, format_relative_time
+    export_leads_to_json, iter_leads_csv, iter_leads_ndjson, iter_csv_leads, iter_json_leads,
+    ORJSONProvider, JSONBodyError, validate_json_body, create_response, require_api_key, require_rate_limit, rate_limiter, allowed_file,
+    format_number, format_percentage, format_relative_time, render_markdown
 )
 import os
 from datetime import datetime, timedelta
-import io
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from scraper import scrape_leads
-import markdown # Import the markdown library
 import secrets
+import queue
+import threading
+import time
+import click
+from cachetools import TTLCache
+
+# Gemini responses may wrap the JSON payload in a markdown code fence
+_JSON_FENCE_RE = re.compile(r"```json\n(.*?)\n```", re.DOTALL)
+
+# Visitor leads created before the visitor_ip column recorded the address only in the bio
+_VISITOR_IP_RE = re.compile(r"Website visitor from IP: (\S+?)\. Visited URL:")
+
+# Fields refreshed when a visitor returns within the same duplicate-check window
+VISITOR_LEAD_UPDATE_FIELDS = ('bio', 'website', 'profile_url', 'company_name', 'company_industry')
+
+# Rows fetched per round-trip while streaming an export
+EXPORT_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+_log_listener = None
+
+
+def configure_logging(level):
+    """Route log records through a queue so request threads never block writing to stderr"""
+    global _log_listener
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _log_listener is not None:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
 
 # Create Flask app
 def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
-    
+    app.json = ORJSONProvider(app)
+    configure_logging(app.config['LOG_LEVEL'])
+
+    # Outside debug mode templates are compiled once and cached as bytecode
+    if not app.debug:
+        app.config['TEMPLATES_AUTO_RELOAD'] = False
+        bytecode_cache_dir = app.config['JINJA_BYTECODE_CACHE_DIR']
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        app.jinja_env.auto_reload = False
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
     # Initialize extensions
     db.init_app(app)
+    cache.init_app(app)
     
     # Initialize Flask-Migrate
     migrate = Migrate(app, db)
@@ -46,32 +93,36 @@ def create_app(config_name='development'):
     # Initialize Flask-Mail
     mail = Mail(app)
     app.mail = mail # Attach mail to app for easy access
+    app.mail_queue = queue.Queue() # Drained by the background mail worker (see send_async)
+    
+    # Gemini lead generation runs here so slow LLM calls don't hold a request worker
+    app.ai_executor = ThreadPoolExecutor(max_workers=app.config['AI_LEADS_WORKERS'])
     
     # Initialize Flask-Login
     login_manager = LoginManager()
     login_manager.init_app(app)
     login_manager.login_view = 'login'
 
-    # Configure Google Gemini API
-    if app.config.get('GOOGLE_GEMINI_API_KEY'):
-        genai.configure(api_key=app.config['GOOGLE_GEMINI_API_KEY'])
-    else:
-        print("WARNING: GOOGLE_GEMINI_API_KEY is not set in config.")
+    # Google Gemini API is imported and configured lazily on first use
+    if not app.config.get('GOOGLE_GEMINI_API_KEY'):
+        logger.warning("GOOGLE_GEMINI_API_KEY is not set in config.")
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return User.get_cached(int(user_id))
     
-    # Create tables
-    with app.app_context():
-        db.create_all()
+    # Schema is managed with `flask db upgrade` / `flask init-db`; only
+    # auto-create tables on startup when explicitly enabled for development
+    if config_name == 'development' and app.config.get('AUTO_CREATE_TABLES'):
+        with app.app_context():
+            db.create_all()
     
     # Register Jinja filters
     app.jinja_env.filters['format_number'] = format_number
     app.jinja_env.filters['format_percentage'] = format_percentage
     app.jinja_env.filters['format_relative_time'] = format_relative_time
     # Register the markdown filter
-    app.jinja_env.filters['markdown'] = lambda text: markdown.markdown(text)
+    app.jinja_env.filters['markdown'] = render_markdown
     
     # Register Jinja globals (functions)
     app.jinja_env.globals['max'] = max
@@ -94,10 +145,17 @@ def register():
     """Register a new user"""
     form = RegistrationForm()
     if form.validate_on_submit():
-        user = User(username=form.username.data, email=form.email.data, member_since=datetime.utcnow())
+        user = User(username=form.username.data, email=form.email.data.strip().lower(), member_since=datetime.utcnow())
         user.set_password(form.password.data)
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another registration took the username or email after this form was validated
+            db.session.rollback()
+            if form.check_available(use_cache=False):
+                flash('Registration failed. Please try again.', 'error')
+            return render_template('register.html', title='Register', form=form)
         flash('Congratulations, you are now a registered user!', 'success')
         return redirect(url_for('login'))
     return render_template('register.html', title='Register', form=form)
@@ -108,11 +166,25 @@ def login():
     if current_user.is_authenticated:
         return redirect(url_for('dashboard'))
     form = LoginForm()
+    # Throttle attempts per client before any validation, lookup or hashing work
+    if request.method == 'POST' and not rate_limiter.is_allowed(
+            f'login:{request.remote_addr}', app.config['LOGIN_RATE_LIMIT'], app.config['LOGIN_RATE_LIMIT_WINDOW']):
+        flash('Too many login attempts. Please try again later.', 'error')
+        return render_template('login.html', title='Sign In', form=form), 429
     if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data).first()
-        if user is None or not user.check_password(form.password.data):
+        email = form.email.data.strip().lower()
+        user = User.query.filter(db.func.lower(User.email) == email).first()
+        # Verify against a dummy hash for unknown emails so both paths cost the same
+        password_hash = user.password_hash if user else DUMMY_PASSWORD_HASH
+        password_ok = verify_password(password_hash, form.password.data)
+        if user is None or not password_ok:
             flash('Invalid email or password', 'error')
             return redirect(url_for('login'))
+        if password_needs_rehash(user.password_hash):
+            # The plain password is known now, so migrate the stored hash to the current Argon2 settings
+            user.set_password(form.password.data)
+            db.session.commit()
+            User.invalidate_cache(user.id)
         login_user(user, remember=form.remember.data)
         return redirect(url_for('dashboard'))
     return render_template('login.html', title='Sign In', form=form)
@@ -136,8 +208,9 @@ def edit_profile():
     form = ProfileForm()
     if form.validate_on_submit():
         current_user.username = form.username.data
-        current_user.email = form.email.data
+        current_user.email = form.email.data.strip().lower()
         db.session.commit()
+        User.invalidate_cache(current_user.id)
         flash('Your changes have been saved.', 'success')
         return redirect(url_for('profile'))
     elif request.method == 'GET':
@@ -182,24 +255,52 @@ def dashboard():
     min_engagement = float(request.args.get('min_engagement', 0.0))
     sort_by = request.args.get('sort_by', 'engagement_score')
     page = int(request.args.get('page', 1))
+    cursor = request.args.get('cursor')
+    per_page = app.config['LEADS_PER_PAGE']
+    user_id = current_user.id
+    
+    # Infinite scroll seeks past the previous page's last row instead of using OFFSET
+    if cursor and request.args.get('ajax'):
+        try:
+            after = Lead.decode_cursor(cursor, sort_by)
+        except ValueError:
+            return jsonify(error='Invalid cursor'), 400
+        
+        leads, next_cursor = Lead.search_leads_page(
+            user_id=user_id,
+            after=after,
+            limit=per_page,
+            order_by=sort_by,
+            query=search_query,
+            platform=platform,
+            min_followers=min_followers,
+            min_engagement=min_engagement
+        )
+        return jsonify(leads=[lead.to_dict() for lead in leads],
+                       has_more=next_cursor is not None,
+                       next_cursor=next_cursor)
     
     # Search leads
     leads, total = Lead.search_leads(
-        user_id=current_user.id,
+        user_id=user_id,
         query=search_query,
         platform=platform,
         min_followers=min_followers,
         min_engagement=min_engagement,
-        limit=app.config['LEADS_PER_PAGE'],
-        offset=(page - 1) * app.config['LEADS_PER_PAGE'],
-        order_by=sort_by
+        limit=per_page,
+        offset=(page - 1) * per_page,
+        order_by=sort_by,
+        # The dashboard table doesn't show bio or tech stack; the AJAX response serializes them
+        detail=bool(request.args.get('ajax'))
     )
     
     # Get statistics
-    stats = Lead.get_statistics(current_user.id)
+    stats = Lead.get_statistics(user_id)
     
     # Pagination info
-    total_pages = (total + app.config['LEADS_PER_PAGE'] - 1) // app.config['LEADS_PER_PAGE']
+    total_pages = (total + per_page - 1) // per_page
+    has_more = (page * per_page) < total
+    next_cursor = Lead.encode_cursor(leads[-1], sort_by) if has_more and leads else None
     
     # Create form for filters
     search_form = SearchForm(
@@ -212,8 +313,7 @@ def dashboard():
     
     if request.args.get('ajax'):
         leads_data = [lead.to_dict() for lead in leads]
-        has_more = (page * app.config['LEADS_PER_PAGE']) < total
-        return jsonify(leads=leads_data, has_more=has_more)
+        return jsonify(leads=leads_data, has_more=has_more, next_cursor=next_cursor)
 
     return render_template('dashboard.html',
                          leads=leads,
@@ -221,7 +321,8 @@ def dashboard():
                          search_form=search_form,
                          page=page,
                          total_pages=total_pages,
-                         total=total)
+                         total=total,
+                         next_cursor=next_cursor)
 
 
 @app.route('/add-lead', methods=['GET', 'POST'])
@@ -245,7 +346,7 @@ def add_lead():
                 'location': form.location.data,
                 'profile_url': form.profile_url.data,
                 'engagement_score': form.engagement_score.data or 0.0,
-                'tags': form.tags.data
+                'tags': form.parsed_tags
             }
             
             # Create lead
@@ -264,7 +365,7 @@ def add_lead():
 @login_required
 def view_lead(lead_id):
     """View lead details"""
-    lead = Lead.query.get_or_404(lead_id)
+    lead = db.get_or_404(Lead, lead_id)
     form = NoteForm()  # Instantiate NoteForm here
     notes = LeadNote.query.filter_by(lead_id=lead.id).order_by(LeadNote.created_at.desc()).all() # Get all notes for a lead, ordered by creation date
     return render_template('view_lead.html', lead=lead, notes=notes, form=form)
@@ -274,7 +375,7 @@ def view_lead(lead_id):
 @login_required
 def add_note(lead_id):
     """Add a new note to a lead"""
-    lead = Lead.query.get_or_404(lead_id)
+    lead = db.get_or_404(Lead, lead_id)
     form = NoteForm()
     if form.validate_on_submit():
         note = LeadNote(
@@ -295,7 +396,7 @@ def add_note(lead_id):
 @login_required
 def delete_note(lead_id, note_id):
     """Delete a note from a lead"""
-    note = LeadNote.query.get_or_404(note_id)
+    note = db.get_or_404(LeadNote, note_id)
     if note.lead_id != lead_id or note.user_id != current_user.id:
         flash('You do not have permission to delete this note.', 'error')
         return redirect(url_for('view_lead', lead_id=lead_id))
@@ -310,7 +411,7 @@ def delete_note(lead_id, note_id):
 @login_required
 def edit_lead(lead_id):
     """Edit existing lead"""
-    lead = Lead.query.get_or_404(lead_id)
+    lead = db.get_or_404(Lead, lead_id)
     form = LeadForm(obj=lead)
     form.set_lead_id(lead_id)  # Set ID to skip duplicate validation
     
@@ -328,7 +429,7 @@ def edit_lead(lead_id):
                 'location': form.location.data,
                 'profile_url': form.profile_url.data,
                 'engagement_score': form.engagement_score.data or 0.0,
-                'tags': form.tags.data
+                'tags': form.parsed_tags
             }
             
             # Update lead
@@ -351,7 +452,7 @@ def edit_lead(lead_id):
 @login_required
 def delete_lead(lead_id):
     """Delete a lead"""
-    lead = Lead.query.get_or_404(lead_id)
+    lead = db.get_or_404(Lead, lead_id)
     username = lead.username
     
     try:
@@ -366,35 +467,46 @@ def delete_lead(lead_id):
 @app.route('/export')
 @login_required
 def export_leads():
-    """Export leads to CSV"""
+    """Export leads to CSV, or to NDJSON with ?format=ndjson"""
     # Get filter parameters (same as dashboard)
     search_query = request.args.get('search', '')
     platform = request.args.get('platform', 'all')
     min_followers = int(request.args.get('min_followers', 0))
     min_engagement = float(request.args.get('min_engagement', 0.0))
     
-    # Get all matching leads (no limit)
-    leads, _ = Lead.search_leads(
+    # Get all matching leads, fetched in batches while the response streams
+    leads = Lead.search_leads_query(
         user_id=current_user.id,
         query=search_query,
         platform=platform,
         min_followers=min_followers,
-        min_engagement=min_engagement,
-        limit=10000  # High limit for export
-    )
-    
-    # Generate CSV
-    csv_data = export_leads_to_csv(leads)
+        min_engagement=min_engagement
+    ).yield_per(EXPORT_BATCH_SIZE)
     
     # Create filename with timestamp
-    filename = f'leads_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    filename = f'leads_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
     
-    # Send file
-    return send_file(
-        io.BytesIO(csv_data.getvalue().encode('utf-8')),
+    # Stream the rows instead of buffering the whole file
+    if request.args.get('format') == 'ndjson':
+        return stream_ndjson_download(leads, f'{filename}.ndjson')
+    return stream_csv_download(leads, f'{filename}.csv')
+
+
+def stream_csv_download(leads, filename):
+    """Return a streamed CSV attachment for the given leads"""
+    return Response(
+        stream_with_context(iter_leads_csv(leads)),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=filename
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+def stream_ndjson_download(leads, filename):
+    """Return a streamed newline-delimited JSON attachment for the given leads"""
+    return Response(
+        stream_with_context(iter_leads_ndjson(leads)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
 
@@ -418,20 +530,17 @@ def import_leads():
         
         if file and allowed_file(file.filename, app.config['ALLOWED_EXTENSIONS']):
             try:
-                # Read file content
-                file_content = file.read()
-                
-                # Parse based on file type
+                # Parse the upload stream incrementally based on file type
                 if file.filename.endswith('.csv'):
-                    leads_data = parse_csv_file(file_content)
+                    leads_data = iter_csv_leads(file.stream)
                 elif file.filename.endswith('.json'):
-                    leads_data = parse_json_file(file_content)
+                    leads_data = iter_json_leads(file.stream)
                 else:
                     flash('Unsupported file format', 'error')
                     return redirect(request.url)
                 
-                # Import leads
-                success_count, error_count, errors = LeadManager.import_leads(leads_data, current_user.id)
+                # Import leads in batches as they are parsed
+                success_count, error_count, errors = LeadManager.import_leads_iter(leads_data, current_user.id)
                 
                 # Show results
                 flash(f'Import completed: {success_count} leads added, {error_count} errors', 
@@ -483,30 +592,26 @@ def bulk_actions():
         
         try:
             if action == 'delete':
-                count = LeadManager.bulk_delete(lead_ids)
+                count = LeadManager.bulk_delete(lead_ids, current_user.id)
                 flash(f'{count} leads deleted successfully', 'success')
                 
             elif action == 'add_tags':
-                tags = [tag.strip() for tag in form.tags.data.split(',') if tag.strip()]
-                count = LeadManager.bulk_update_tags(lead_ids, tags, 'add')
+                tags = form.parsed_tags
+                count = LeadManager.bulk_update_tags(lead_ids, tags, 'add', current_user.id)
                 flash(f'Tags added to {count} leads', 'success')
                 
             elif action == 'remove_tags':
-                tags = [tag.strip() for tag in form.tags.data.split(',') if tag.strip()]
-                count = LeadManager.bulk_update_tags(lead_ids, tags, 'remove')
+                tags = form.parsed_tags
+                count = LeadManager.bulk_update_tags(lead_ids, tags, 'remove', current_user.id)
                 flash(f'Tags removed from {count} leads', 'success')
                 
             elif action == 'export':
-                leads = Lead.query.filter(Lead.id.in_(lead_ids)).all()
-                csv_data = export_leads_to_csv(leads)
+                leads = Lead.query.filter(
+                    Lead.id.in_(lead_ids), Lead.user_id == current_user.id
+                ).yield_per(EXPORT_BATCH_SIZE)
                 filename = f'leads_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
                 
-                return send_file(
-                    io.BytesIO(csv_data.getvalue().encode('utf-8')),
-                    mimetype='text/csv',
-                    as_attachment=True,
-                    download_name=filename
-                )
+                return stream_csv_download(leads, filename)
         
         except Exception as e:
             flash(f'Error performing bulk action: {str(e)}', 'error')
@@ -536,29 +641,115 @@ def calculate_engagement():
     
     return render_template('calculate_engagement.html', form=form, result=result)
 
+# Generated/scraped lead lists are kept server-side; the session cookie only carries a key
+PENDING_LEADS_TIMEOUT = 900
+
+
+def stash_pending_leads(name, leads):
+    """Store a list of lead dicts in the cache and remember its key in the session"""
+    token = secrets.token_urlsafe(16)
+    cache.set(f'pending_leads:{token}', leads, timeout=PENDING_LEADS_TIMEOUT)
+    session[f'{name}_token'] = token
+
+
+def get_pending_leads(name):
+    """Return the lead dicts stashed under name, or an empty list if none/expired"""
+    token = session.get(f'{name}_token')
+    if not token:
+        return []
+    return cache.get(f'pending_leads:{token}') or []
+
+
+def clear_pending_leads(name):
+    """Forget the lead dicts stashed under name"""
+    token = session.pop(f'{name}_token', None)
+    if token:
+        cache.delete(f'pending_leads:{token}')
+
+
+# AI lead generation jobs run on app.ai_executor; their state lives in the shared cache so
+# any worker can report it, and the page polls a status endpoint every interval (seconds)
+AI_LEADS_JOB_POLL_INTERVAL = 2
+
+
+def _ai_leads_job_key(job_id):
+    return f'ai_leads:{job_id}'
+
+
+def run_ai_leads_job(job_id, prompt, user_id):
+    """Background task: generate leads and record the outcome under the job key"""
+    with app.app_context():
+        job = {'user_id': user_id}
+        try:
+            job['leads'] = generate_leads_with_gemini(prompt)
+            job['state'] = 'SUCCESS'
+        except Exception as e:
+            logger.warning("Gemini API error: %s", e)
+            job['state'] = 'FAILURE'
+            job['error'] = str(e)
+        cache.set(_ai_leads_job_key(job_id), job, timeout=PENDING_LEADS_TIMEOUT)
+
+
+def get_ai_leads_job(job_id):
+    """Return the current user's job record, or None if unknown/expired"""
+    job = cache.get(_ai_leads_job_key(job_id))
+    if not job or job.get('user_id') != current_user.id:
+        return None
+    return job
+
+
 @app.route('/generate-ai-leads', methods=['GET', 'POST'])
 @login_required
 def generate_ai_leads():
     """Generate leads using Google Gemini API"""
     form = GeminiLeadGenerationForm()
-    generated_leads = []
 
     if form.validate_on_submit():
-        prompt = form.prompt.data
-        generated_leads = generate_leads_with_gemini(prompt)
-        if generated_leads:
-            flash(f'{len(generated_leads)} leads generated successfully!', 'success')
-            session['generated_leads'] = generated_leads  # Store as list of dicts
+        if not app.config['GOOGLE_GEMINI_API_KEY']:
+            flash("Google Gemini API key is not configured.", "error")
+            return redirect(url_for('generate_ai_leads'))
+
+        job_id = secrets.token_urlsafe(16)
+        cache.set(_ai_leads_job_key(job_id), {'state': 'PENDING', 'user_id': current_user.id},
+                  timeout=PENDING_LEADS_TIMEOUT)
+        app.ai_executor.submit(run_ai_leads_job, job_id, form.prompt.data, current_user.id)
+        return redirect(url_for('generate_ai_leads', job=job_id))
+
+    job_id = request.args.get('job')
+    if job_id:
+        job = get_ai_leads_job(job_id)
+        if job is None:
+            flash('That lead generation job has expired. Please try again.', 'warning')
+        elif job['state'] == 'PENDING':
+            return render_template('generate_ai_leads.html', form=form, generated_leads=[], job_id=job_id,
+                                   poll_interval=AI_LEADS_JOB_POLL_INTERVAL)
         else:
-            flash('No leads were generated. Please try a different prompt.', 'warning')
-        
-    # Retrieve generated leads from session if available for display
-    if 'generated_leads' in session:
-        generated_leads = session.get('generated_leads', [])
+            cache.delete(_ai_leads_job_key(job_id))
+            if job['state'] == 'FAILURE':
+                flash(f"Error generating leads with Gemini API: {job['error']}", "error")
+            elif job['leads']:
+                flash(f"{len(job['leads'])} leads generated successfully!", 'success')
+                stash_pending_leads('generated_leads', job['leads'])
+            else:
+                flash('No leads were generated. Please try a different prompt.', 'warning')
+        return redirect(url_for('generate_ai_leads'))
+
+    # Retrieve previously generated leads if available for display
+    generated_leads = get_pending_leads('generated_leads')
 
     return render_template('generate_ai_leads.html', form=form, generated_leads=generated_leads)
 
 
+@app.route('/ai-leads/status/<job_id>')
+@login_required
+def ai_leads_status(job_id):
+    """Report an AI lead generation job's state; the page polls this instead of holding a worker open"""
+    job = get_ai_leads_job(job_id)
+    if job is None:
+        return create_response(error='Job not found', status=404)
+    return create_response(data={'state': job['state']})
+
+
 @app.route('/add-lead-from-ai', methods=['POST'])
 @login_required
 def add_lead_from_ai():
@@ -589,15 +780,8 @@ def add_lead_from_ai():
             flash("Skipping lead due to missing username or platform.", "error")
             return redirect(url_for('generate_ai_leads'))
 
-        # Check for duplicates before adding
-        existing_lead = Lead.query.filter_by(
-            username=lead_data.get('username'),
-            platform=lead_data.get('platform'),
-            user_id=current_user.id
-        ).first()
-
-        if not existing_lead:
-            LeadManager.create_lead(lead_data)
+        # Insert unless it already exists, in one statement
+        if LeadManager.create_lead_if_absent(lead_data) is not None:
             flash(f"Lead '{lead_data.get('username')}' added successfully!", "success")
         else:
             flash(f"Lead '{lead_data.get('username')}' on {lead_data.get('platform')} already exists.", "info")
@@ -621,12 +805,12 @@ def scrape_leads_route():
         
         if scraped_data:
             flash(f'{len(scraped_data)} potential leads scraped from {url}!', 'success')
-            session['scraped_leads'] = scraped_data
+            stash_pending_leads('scraped_leads', scraped_data)
         else:
             flash(f'No leads were scraped from {url}. Please check the URL or try a different one.', 'warning')
     
-    if 'scraped_leads' in session:
-        scraped_leads = session.get('scraped_leads', [])
+    if not scraped_leads:
+        scraped_leads = get_pending_leads('scraped_leads')
 
     return render_template('scrape_leads.html', form=form, scraped_leads=scraped_leads, csrf_token=form.csrf_token)
 
@@ -641,42 +825,33 @@ def add_scraped_leads():
         flash('No leads selected for addition.', 'warning')
         return redirect(url_for('scrape_leads_route'))
 
-    scraped_leads_data = session.get('scraped_leads', [])
+    scraped_leads_data = get_pending_leads('scraped_leads')
     
-    added_count = 0
+    selected_leads = []
     for index_str in selected_indices:
         try:
             index = int(index_str)
-            if 0 <= index < len(scraped_leads_data):
-                lead_data = scraped_leads_data[index]
-                # Ensure user_id is set for the current user
-                lead_data['user_id'] = current_user.id
-                # Basic validation for required fields
-                if not lead_data.get('username') or not lead_data.get('platform'):
-                    flash(f"Skipping lead due to missing username or platform: {lead_data}", "error")
-                    continue
-
-                # Check for duplicates before adding
-                existing_lead = Lead.query.filter_by(
-                    username=lead_data.get('username'),
-                    platform=lead_data.get('platform'),
-                    user_id=current_user.id
-                ).first()
-
-                if not existing_lead:
-                    LeadManager.create_lead(lead_data)
-                    added_count += 1
-                else:
-                    flash(f"Lead '{lead_data.get('username')}' on {lead_data.get('platform')} already exists.", "info")
-            else:
-                flash(f"Invalid lead index: {index_str}", "error")
-        except Exception as e:
-            flash(f"Error adding lead with index {index_str}: {str(e)}", "error")
+        except ValueError:
+            index = -1
+        if not 0 <= index < len(scraped_leads_data):
+            flash(f"Invalid lead index: {index_str}", "error")
+            continue
+        
+        lead_data = scraped_leads_data[index]
+        # Basic validation for required fields
+        if not lead_data.get('username') or not lead_data.get('platform'):
+            flash(f"Skipping lead due to missing username or platform: {lead_data}", "error")
             continue
+        selected_leads.append(lead_data)
+    
+    # Duplicate checks and inserts happen in one batch
+    added_count, _, errors = LeadManager.import_leads(selected_leads, current_user.id)
+    for error in errors[:10]:
+        flash(error, 'info')
     
     if added_count > 0:
         flash(f'{added_count} selected leads added to the database successfully!', 'success')
-        session.pop('scraped_leads', None) # Clear scraped leads from session
+        clear_pending_leads('scraped_leads') # Clear stashed scraped leads
     else:
         flash('No leads were added to the database.', 'warning')
         
@@ -688,14 +863,17 @@ def add_scraped_leads():
 @login_required
 def ai_chat(lead_id):
     """AI Chat feature for a specific lead"""
-    lead = Lead.query.get_or_404(lead_id)
-    
-    # Retrieve chat history from the database
-    chat_history = ChatMessage.query.filter_by(lead_id=lead_id, user_id=current_user.id).order_by(ChatMessage.created_at).all()
+    lead = db.get_or_404(Lead, lead_id)
+    history_query = ChatMessage.query.filter_by(lead_id=lead_id, user_id=current_user.id)
 
     if request.method == 'POST':
         user_message = request.form.get('message')
         if user_message:
+            # Only the most recent turns go into the prompt, keeping its size bounded
+            chat_history = history_query.order_by(
+                ChatMessage.created_at.desc(), ChatMessage.id.desc()
+            ).limit(app.config['CHAT_HISTORY_WINDOW']).all()[::-1]
+            
             # Save user message to the database
             new_user_message = ChatMessage(
                 lead_id=lead_id,
@@ -707,36 +885,37 @@ def ai_chat(lead_id):
             db.session.commit()
             
             try:
-                model = genai.GenerativeModel('gemini-2.5-flash')
+                model = _get_gemini_model()
                 # Construct a prompt that includes lead info and chat history
-                full_chat_prompt = f"You are an AI assistant helping with lead management for {lead.full_name or lead.username} ({lead.platform}). Here's their info: Bio: {lead.bio or 'N/A'}, Followers: {lead.followers or 0}, Email: {lead.email or 'N/A'}, Location: {lead.location or 'N/A'}, Tags: {', '.join(lead.tags_list)}. \n\nPrevious conversation:\n"
-                for msg in chat_history:
-                    full_chat_prompt += f"{msg.role}: {msg.content}\n"
-                full_chat_prompt += f"user: {user_message}\nAI:"
+                prompt_parts = [f"You are an AI assistant helping with lead management for {lead.full_name or lead.username} ({lead.platform}). Here's their info: Bio: {lead.bio or 'N/A'}, Followers: {lead.followers or 0}, Email: {lead.email or 'N/A'}, Location: {lead.location or 'N/A'}, Tags: {', '.join(lead.tags_list)}. \n\nPrevious conversation:\n"]
+                prompt_parts.extend(f"{msg.role}: {msg.content}\n" for msg in chat_history)
+                prompt_parts.append(f"user: {user_message}\nAI:")
+                full_chat_prompt = ''.join(prompt_parts)
 
                 response_stream = model.generate_content(full_chat_prompt, stream=True)
                 
                 # Stream the content directly to the client
+                user_id = current_user.id
                 def generate_stream():
-                    full_ai_response = ""
+                    response_chunks = []
                     for chunk in response_stream:
                         text_chunk = chunk.text
-                        full_ai_response += text_chunk
+                        response_chunks.append(text_chunk)
                         yield text_chunk
                     
                     # After streaming, save the full AI response to the database
                     new_ai_message = ChatMessage(
                         lead_id=lead_id,
-                        user_id=current_user.id,
+                        user_id=user_id,
                         role='model',
-                        content=full_ai_response
+                        content=''.join(response_chunks)
                     )
                     db.session.add(new_ai_message)
                     db.session.commit()
                 
                 return app.response_class(stream_with_context(generate_stream()), mimetype='text/plain')
             except Exception as e:
-                traceback.print_exc() # This will print the full traceback to the console
+                logger.exception("AI chat error for lead %s", lead_id)
                 ai_response = f"Error communicating with AI: {str(e)}"
                 flash(ai_response, 'error')
                 # Save error message to the database
@@ -750,13 +929,15 @@ def ai_chat(lead_id):
                 db.session.commit()
                 return app.response_class(ai_response, mimetype='text/plain'), 500
         
+    # Retrieve chat history from the database
+    chat_history = history_query.order_by(ChatMessage.created_at).all()
     return render_template('ai_chat.html', lead=lead, chat_history=chat_history)
 
 @app.route('/ai-chat/<int:lead_id>/delete-message/<int:message_id>', methods=['POST'])
 @login_required
 def delete_chat_message(lead_id, message_id):
     """Delete a specific chat message."""
-    message = ChatMessage.query.get_or_404(message_id)
+    message = db.get_or_404(ChatMessage, message_id)
     if message.lead_id != lead_id or message.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
@@ -767,7 +948,7 @@ def delete_chat_message(lead_id, message_id):
 @app.route('/generate-email-content/<int:lead_id>', methods=['POST'])
 @login_required
 def generate_email_content(lead_id):
-    lead = Lead.query.get_or_404(lead_id)
+    lead = db.get_or_404(Lead, lead_id)
     data = request.get_json()
     subject = data.get('subject')
     pitch = data.get('pitch')
@@ -780,7 +961,7 @@ def generate_email_content(lead_id):
         return jsonify({'error': 'Subject and pitch are required.'}), 400
 
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        model = _get_gemini_model()
         
         # Construct the prompt with fine-tuning controls
         email_prompt = f"""
@@ -815,7 +996,7 @@ def generate_email_content(lead_id):
 @app.route('/send-generated-email/<int:lead_id>', methods=['POST'])
 @login_required
 def send_generated_email(lead_id):
-    lead = Lead.query.get_or_404(lead_id)
+    lead = db.get_or_404(Lead, lead_id)
     subject = request.form.get('subject')
     body = request.form.get('body')
 
@@ -839,7 +1020,17 @@ def send_generated_email(lead_id):
 
 @app.route('/api/track-visitor', methods=['POST'])
 def api_track_visitor():
-    """API: Receive and process website visitor data for lead generation."""
+    """API: Receive and process website visitor data for lead generation.
+
+    Visits are de-duplicated per IP within fixed, epoch-aligned windows of
+    VISITOR_LEAD_DUPLICATE_CHECK_HOURS, not a sliding window: visits either
+    side of a window boundary create two leads even if minutes apart.
+    """
+    # Visitor leads belong to the signed-in account; resolve the user proxy once
+    user = current_user._get_current_object()
+    if not user.is_authenticated:
+        return create_response(error='Authentication required', status=401)
+
     try:
         data = request.get_json()
         if not data:
@@ -858,9 +1049,12 @@ def api_track_visitor():
         else:
             pass
 
+        # Visits from one IP within the same duplicate-check window share a username, so the
+        # (user_id, username, platform) unique constraint identifies the lead to update
+        window = app.config['VISITOR_LEAD_DUPLICATE_CHECK_HOURS'] * 3600
         lead_data = {
-            'user_id': current_user.id if current_user.is_authenticated else None,
-            'username': f"visitor_{visitor_ip}_{datetime.utcnow().timestamp()}",
+            'user_id': user.id,
+            'username': f"visitor_{visitor_ip}_{int(time.time()) // window}",
             'platform': 'website_visit',
             'full_name': None,
             'bio': f"Website visitor from IP: {visitor_ip}. Visited URL: {data.get('url')}",
@@ -873,37 +1067,27 @@ def api_track_visitor():
             'company_size': None,
             'job_title': None,
             'tech_stack': None,
+            'visitor_ip': visitor_ip,
             'engagement_score': 0.0,
             'tags': ['website_visitor']
         }
 
-        # Handle potential duplicates based on IP/session within a certain timeframe
-        # Check for existing leads from the same IP within the last 24 hours
-        time_threshold = datetime.utcnow() - timedelta(hours=current_app.config['VISITOR_LEAD_DUPLICATE_CHECK_HOURS'])
-        existing_lead = Lead.query.filter(
-            Lead.bio.ilike(f"%Website visitor from IP: {visitor_ip}%"),
-            Lead.created_at >= time_threshold
-        ).first()
-
         try:
-            if existing_lead:
-                # Update existing lead
-                LeadManager.update_lead(existing_lead.id, lead_data)
-                return create_response(
-                    data={'lead_id': existing_lead.id, 'username': existing_lead.username},
-                    message='Visitor data updated successfully',
-                    status=200
-                )
-            else:
-                # Create new lead
-                lead = LeadManager.create_lead(lead_data)
+            # Create the visitor lead, or refresh this window's existing one, in a single upsert
+            lead_id, created = LeadManager.upsert_lead(lead_data, VISITOR_LEAD_UPDATE_FIELDS)
+            if created:
                 return create_response(
-                    data={'lead_id': lead.id, 'username': lead.username},
+                    data={'lead_id': lead_id, 'username': lead_data['username']},
                     message='Visitor data processed and lead created successfully',
                     status=201
                 )
+            return create_response(
+                data={'lead_id': lead_id, 'username': lead_data['username']},
+                message='Visitor data updated successfully',
+                status=200
+            )
         except Exception as e:
-            print(f"Error processing lead from visitor data: {e}")
+            logger.exception("Error processing lead from visitor data")
             return create_response(
                 error=f'Failed to process lead from visitor data: {str(e)}',
                 status=500
@@ -916,6 +1100,7 @@ def api_track_visitor():
         )
 
 @app.route('/api/leads', methods=['GET'])
+@require_api_key
 @require_rate_limit(limit=100, window=3600)
 def api_get_leads():
     """API: Get all leads with filtering"""
@@ -928,21 +1113,47 @@ def api_get_leads():
         limit = min(int(request.args.get('limit', 100)), 1000)  # Max 1000
         offset = int(request.args.get('offset', 0))
         sort_by = request.args.get('sort_by', 'engagement_score')
+        filters = {
+            'query': search_query,
+            'platform': platform,
+            'min_followers': min_followers,
+            'min_engagement': min_engagement
+        }
         
-        # Search leads
-        leads, total = Lead.search_leads(
-            query=search_query,
-            platform=platform,
-            min_followers=min_followers,
-            min_engagement=min_engagement,
+        # A cursor parameter (empty for the first page) switches to keyset pagination,
+        # which seeks past the previous page instead of scanning OFFSET rows
+        if 'cursor' in request.args:
+            cursor = request.args['cursor']
+            try:
+                after = Lead.decode_cursor(cursor, sort_by) if cursor else None
+            except ValueError:
+                return create_response(error='Invalid cursor', status=400)
+            
+            leads_data, next_cursor = Lead.search_rows_page(
+                user_id=request.api_user.id,
+                after=after,
+                limit=limit,
+                order_by=sort_by,
+                **filters
+            )
+            return create_response(
+                data={
+                    'leads': leads_data,
+                    'limit': limit,
+                    'next_cursor': next_cursor
+                },
+                message='Leads retrieved successfully'
+            )
+        
+        # Search leads, serializing straight from the result rows
+        leads_data, total = Lead.search_rows(
+            user_id=request.api_user.id,
             limit=limit,
             offset=offset,
-            order_by=sort_by
+            order_by=sort_by,
+            **filters
         )
         
-        # Convert to dict
-        leads_data = [lead.to_dict() for lead in leads]
-        
         return create_response(
             data={
                 'leads': leads_data,
@@ -965,7 +1176,7 @@ def api_get_leads():
 def api_get_lead(lead_id):
     """API: Get single lead by ID"""
     try:
-        lead = Lead.query.get(lead_id)
+        lead = db.session.get(Lead, lead_id)
         
         if not lead:
             return create_response(
@@ -989,29 +1200,10 @@ def api_get_lead(lead_id):
 @require_rate_limit(limit=50, window=3600)
 def api_create_lead():
     """API: Create new lead"""
+    _, data = validate_json_body(LeadAPIForm)
     try:
-        data = request.get_json()
-        
-        if not data:
-            return create_response(
-                error='No data provided',
-                status=400
-            )
-        
-        # Validate required fields
-        if 'username' not in data or 'platform' not in data:
-            return create_response(
-                error='Username and platform are required',
-                status=400
-            )
-        
         # Check for duplicate
-        existing = Lead.query.filter_by(
-            username=data['username'],
-            platform=data['platform']
-        ).first()
-        
-        if existing:
+        if LeadManager.exists(data['username'], data['platform']):
             return create_response(
                 error='Lead with this username already exists on this platform',
                 status=409
@@ -1037,15 +1229,8 @@ def api_create_lead():
 @require_rate_limit(limit=50, window=3600)
 def api_update_lead(lead_id):
     """API: Update existing lead"""
+    _, data = validate_json_body(LeadUpdateAPIForm)
     try:
-        data = request.get_json()
-        
-        if not data:
-            return create_response(
-                error='No data provided',
-                status=400
-            )
-        
         # Update lead
         lead = LeadManager.update_lead(lead_id, data)
         
@@ -1092,27 +1277,13 @@ def api_delete_lead(lead_id):
 
 
 @app.route('/api/leads/bulk-delete', methods=['POST'])
+@require_api_key
 @require_rate_limit(limit=20, window=3600)
 def api_bulk_delete():
-    """API: Bulk delete leads"""
+    """API: Bulk delete the API key owner's leads"""
+    form, _ = validate_json_body(BulkDeleteAPIForm)
     try:
-        data = request.get_json()
-        
-        if not data or 'lead_ids' not in data:
-            return create_response(
-                error='lead_ids array is required',
-                status=400
-            )
-        
-        lead_ids = data['lead_ids']
-        
-        if not isinstance(lead_ids, list):
-            return create_response(
-                error='lead_ids must be an array',
-                status=400
-            )
-        
-        count = LeadManager.bulk_delete(lead_ids)
+        count = LeadManager.bulk_delete(form.lead_ids.data, request.api_user.id)
         
         return create_response(
             data={'deleted_count': count},
@@ -1132,10 +1303,7 @@ def api_bulk_delete():
 def api_get_stats():
     """API: Get statistics"""
     try:
-        stats = Lead.get_statistics(current_user.id)
-        
-        # Convert recent leads to dict
-        stats['recent_leads'] = [lead.to_dict() for lead in stats['recent_leads']]
+        stats = Lead.get_statistics_dict(request.api_user.id)
         
         return create_response(
             data=stats,
@@ -1155,7 +1323,7 @@ def api_get_stats():
 def api_get_tags():
     """API: Get all unique tags"""
     try:
-        tags = Lead.get_all_tags(current_user.id)
+        tags = Lead.get_all_tags(request.api_user.id)
         
         return create_response(
             data={'tags': tags},
@@ -1173,18 +1341,11 @@ def api_get_tags():
 @require_rate_limit(limit=100, window=3600)
 def api_calculate_engagement():
     """API: Calculate engagement score"""
+    form, _ = validate_json_body(EngagementCalculatorForm)
     try:
-        data = request.get_json()
-        
-        if not data or 'followers' not in data:
-            return create_response(
-                error='followers count is required',
-                status=400
-            )
-        
-        followers = int(data['followers'])
-        avg_likes = int(data.get('avg_likes', 0))
-        avg_comments = int(data.get('avg_comments', 0))
+        followers = form.followers.data
+        avg_likes = form.avg_likes.data or 0
+        avg_comments = form.avg_comments.data or 0
         
         score = Lead.calculate_engagement_score(followers, avg_likes, avg_comments)
         
@@ -1198,11 +1359,6 @@ def api_calculate_engagement():
             message='Engagement score calculated successfully'
         )
         
-    except ValueError:
-        return create_response(
-            error='Invalid input values',
-            status=400
-        )
     except Exception as e:
         return create_response(
             error=str(e),
@@ -1225,23 +1381,24 @@ def api_docs():
 def api_keys_list():
     """List all API keys for the current user"""
     api_keys = APIKey.query.filter_by(user_id=current_user.id).all()
-    return render_template('api_keys.html', api_keys=api_keys)
+    # Only hashes are stored, so a newly generated key is shown this one time
+    new_key = session.pop('new_api_key', None)
+    return render_template('api_keys.html', api_keys=api_keys, new_key=new_key)
 
 @app.route('/api/keys/generate', methods=['POST'])
 @login_required
 def generate_api_key():
     """Generate a new API key for the current user"""
     try:
-        # Generate a new key
-        new_key_value = secrets.token_urlsafe(32)
-        
         # Set expiration (e.g., 1 year from now)
         expires_at = datetime.utcnow() + timedelta(days=365)
 
-        api_key = APIKey(user_id=current_user.id, key=new_key_value, expires_at=expires_at)
+        # Generate a new key; only its hash is saved
+        api_key, new_key_value = APIKey.generate(current_user.id, expires_at)
         db.session.add(api_key)
         db.session.commit()
-        flash('New API key generated successfully!', 'success')
+        session['new_api_key'] = new_key_value
+        flash('New API key generated successfully! Copy it now; it will not be shown again.', 'success')
     except Exception as e:
         flash(f'Error generating API key: {str(e)}', 'error')
     return redirect(url_for('api_keys_list'))
@@ -1286,6 +1443,16 @@ def internal_server_error(e):
     return render_template('500.html'), 500
 
 
+@app.errorhandler(JSONBodyError)
+def invalid_json_body(e):
+    """Handle API request bodies that fail validation"""
+    return create_response(
+        data={'errors': e.errors},
+        error=str(e),
+        status=400
+    )
+
+
 @app.errorhandler(429)
 def rate_limit_exceeded(e):
     """Handle rate limit errors"""
@@ -1303,11 +1470,48 @@ def rate_limit_exceeded(e):
 def init_db():
     """Initialize the database."""
     db.create_all()
-    print('Database initialized!')
+    # Existing leads need their lead_tags rows before tag filters and lists can see them
+    count = Lead.sync_tag_rows()
+    print(f'Database initialized! Synced tags for {count} leads.')
+
+
+@app.cli.command('sync-lead-tags')
+def sync_lead_tags():
+    """Rebuild the lead_tags table from each lead's stored tags."""
+    count = Lead.sync_tag_rows()
+    print(f'Synced tags for {count} leads.')
+
+
+@app.cli.command('hash-api-keys')
+def hash_api_keys():
+    """Replace stored plaintext API keys with their hashes."""
+    count = 0
+    for api_key in APIKey.query.filter(APIKey.key.isnot(None)):
+        api_key.key_hash = APIKey.hash_key(api_key.key)
+        api_key.key_prefix = api_key.key[:8]
+        api_key.key = None
+        count += 1
+    db.session.commit()
+    print(f'Hashed {count} API keys.')
+
+
+@app.cli.command('backfill-visitor-ips')
+def backfill_visitor_ips():
+    """Populate visitor_ip for website visitor leads created before the column existed."""
+    count = 0
+    leads = Lead.query.filter(Lead.platform == 'website_visit', Lead.visitor_ip.is_(None))
+    for lead in leads.yield_per(500):
+        match = _VISITOR_IP_RE.match(lead.bio or '')
+        if match:
+            lead.visitor_ip = match.group(1)
+            count += 1
+    db.session.commit()
+    print(f'Backfilled visitor_ip for {count} leads.')
 
 
 @app.cli.command()
-def seed_db():
+@click.option('--user', 'username', required=True, help='Username of the account that will own the sample leads.')
+def seed_db(username):
     """Seed database with sample data."""
     sample_leads = [
         {
@@ -1348,13 +1552,22 @@ def seed_db():
         }
     ]
     
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f'No user named {username}')
+    
+    # One query for the leads that already exist, then a single batched insert
+    existing = set(db.session.query(Lead.username, Lead.platform).filter_by(user_id=user.id))
+    new_leads = []
     for lead_data in sample_leads:
-        try:
-            LeadManager.create_lead(lead_data)
-            print(f"Created lead: {lead_data['username']}")
-        except:
+        if (lead_data['username'], lead_data['platform']) in existing:
             print(f"Skipped (already exists): {lead_data['username']}")
+            continue
+        new_leads.append(LeadManager.build_lead({**lead_data, 'user_id': user.id}))
+        print(f"Created lead: {lead_data['username']}")
     
+    db.session.add_all(new_leads)
+    db.session.commit()
     print('Database seeded!')
 
 
@@ -1362,8 +1575,11 @@ def seed_db():
 # Email Functions
 # ============================================================================
 
+_mail_worker_lock = threading.Lock()
+_mail_worker_thread = None
+
 def send_lead_email(lead_id, subject, message):
-    lead = Lead.query.get(lead_id)
+    lead = db.session.get(Lead, lead_id)
     
     if not lead.email:
         return False
@@ -1374,46 +1590,109 @@ def send_lead_email(lead_id, subject, message):
         html=message
     )
     
-    app.mail.send(msg)
-    
-    # Log email
+    # Log email; the mail worker flips the status once SMTP has answered
     email_log = EmailLog(
         lead_id=lead_id,
         user_id=current_user.id,
         subject=subject,
         body=message,
-        status='sent'
+        status='queued'
     )
     db.session.add(email_log)
     db.session.commit()
     
+    send_async(msg, email_log.id)
+    
     return True
 
+def send_async(msg, email_log_id=None):
+    """Queue a message for delivery by the background mail worker"""
+    global _mail_worker_thread
+    
+    # Started lazily so each (possibly forked) worker process gets its own thread
+    with _mail_worker_lock:
+        if _mail_worker_thread is None or not _mail_worker_thread.is_alive():
+            _mail_worker_thread = threading.Thread(target=_mail_worker, args=(app,), daemon=True)
+            _mail_worker_thread.start()
+    
+    app.mail_queue.put((msg, email_log_id))
+
+def _mail_worker(flask_app):
+    """Send queued messages and record the outcome on their email log"""
+    while True:
+        msg, email_log_id = flask_app.mail_queue.get()
+        with flask_app.app_context():
+            try:
+                flask_app.mail.send(msg)
+                status = 'sent'
+            except Exception as e:
+                logger.warning("Mail send error: %s", e)
+                status = 'failed'
+            
+            if email_log_id is not None:
+                email_log = db.session.get(EmailLog, email_log_id)
+                if email_log:
+                    email_log.status = status
+                    db.session.commit()
+        flask_app.mail_queue.task_done()
+
 # ============================================================================
 # CRM Integration Functions
 # ============================================================================
 
+# Logging in to Salesforce is a round trip of its own, so the session is reused
+# until it is close to Salesforce's default two-hour timeout
+SALESFORCE_SESSION_TTL = 1800
+_salesforce_clients = TTLCache(maxsize=1, ttl=SALESFORCE_SESSION_TTL)
+_salesforce_clients_lock = threading.Lock()
+
+def _get_salesforce_client():
+    """Authenticated Salesforce client, shared across syncs until its session ages out"""
+    with _salesforce_clients_lock:
+        sf = _salesforce_clients.get('client')
+        if sf is None:
+            from simple_salesforce import Salesforce
+            sf = Salesforce(
+                username=app.config['SALESFORCE_USERNAME'],
+                password=app.config['SALESFORCE_PASSWORD'],
+                security_token=app.config['SALESFORCE_TOKEN']
+            )
+            _salesforce_clients['client'] = sf
+        return sf
+
+def _with_salesforce(operation):
+    """Run operation(sf), logging in again once if the cached session has expired"""
+    from simple_salesforce.exceptions import SalesforceExpiredSession
+
+    try:
+        return operation(_get_salesforce_client())
+    except SalesforceExpiredSession:
+        with _salesforce_clients_lock:
+            _salesforce_clients.pop('client', None)
+        return operation(_get_salesforce_client())
+
+@lru_cache(maxsize=None)
+def _get_hubspot_client():
+    """Shared HubSpot client, so syncs reuse its connection pool"""
+    from hubspot import HubSpot
+
+    return HubSpot(access_token=app.config['HUBSPOT_API_KEY'])
+
 def sync_to_salesforce(lead):
     try:
-        sf = Salesforce(
-            username=app.config['SALESFORCE_USERNAME'],
-            password=app.config['SALESFORCE_PASSWORD'],
-            security_token=app.config['SALESFORCE_TOKEN']
-        )
-        
         # Prepare lead data for Salesforce
         first_name = lead.full_name.split() if lead.full_name else ''
         last_name = lead.full_name.split()[-1] if lead.full_name else lead.username
         
         # Create lead in Salesforce
-        result = sf.Lead.create({
+        result = _with_salesforce(lambda sf: sf.Lead.create({
             'FirstName': first_name,
             'LastName': last_name,
             'Company': 'Unknown', # Default company, can be customized
             'Email': lead.email,
             'Status': 'Open',
             'LeadSource': lead.platform
-        })
+        }))
         
         # Store Salesforce ID
         lead.salesforce_id = result['id']
@@ -1424,12 +1703,14 @@ def sync_to_salesforce(lead):
     
     except Exception as e:
         flash(f'Error syncing lead {lead.username} to Salesforce: {str(e)}', 'error')
-        print(f"Salesforce sync error: {e}")
+        logger.warning("Salesforce sync error: %s", e)
         return None
 
 def sync_to_hubspot(lead):
+    from hubspot.crm.contacts import SimplePublicObjectInput
+
     try:
-        client = HubSpot(access_token=app.config['HUBSPOT_API_KEY'])
+        client = _get_hubspot_client()
         
         properties = {
             "email": lead.email,
@@ -1454,10 +1735,12 @@ def sync_to_hubspot(lead):
     
     except Exception as e:
         flash(f'Error syncing lead {lead.username} to HubSpot: {str(e)}', 'error')
-        print(f"HubSpot sync error: {e}")
+        logger.warning("HubSpot sync error: %s", e)
         return None
 
 def fetch_twitter_lead(username):
+    import tweepy
+
     # Setup API
     auth = tweepy.OAuthHandler(
         app.config['TWITTER_API_KEY'],
@@ -1489,6 +1772,8 @@ def fetch_twitter_lead(username):
     return LeadManager.create_lead(lead_data, current_user.id)
 
 def fetch_instagram_lead(username):
+    from instagrapi import Client
+
     cl = Client()
     cl.login(
         app.config['INSTAGRAM_USERNAME'],
@@ -1517,15 +1802,27 @@ def fetch_instagram_lead(username):
 # Gemini API Integration
 # ============================================================================
 
+@lru_cache(maxsize=None)
+def _get_genai():
+    """Import and configure the Gemini SDK once, on first use"""
+    import google.generativeai as genai
+
+    if app.config.get('GOOGLE_GEMINI_API_KEY'):
+        genai.configure(api_key=app.config['GOOGLE_GEMINI_API_KEY'])
+    return genai
+
+@lru_cache(maxsize=None)
+def _get_gemini_model():
+    """Shared GenerativeModel, so routes reuse the SDK's client and connection"""
+    return _get_genai().GenerativeModel('gemini-2.5-flash')
+
 def generate_leads_with_gemini(prompt):
+    """Ask Gemini for leads matching prompt; raises on API or parsing errors"""
     api_key = app.config['GOOGLE_GEMINI_API_KEY']
     if not api_key:
-        flash("Google Gemini API key is not configured.", "error")
-        print("Google Gemini API key is not configured.")
-        return []
+        raise RuntimeError("Google Gemini API key is not configured.")
 
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = _get_gemini_model()
 
     # Craft the prompt for lead generation
     full_prompt = f"""
@@ -1554,36 +1851,30 @@ def generate_leads_with_gemini(prompt):
     Generate at least 3 leads that you have verified are real accounts.
     """
 
-    try:
-        response = model.generate_content(full_prompt)
-        raw_response_text = response.text
-        print(f"Raw Gemini API response: {raw_response_text}") # Debugging line
-        
-        # Extract JSON from the response text, which may be wrapped in markdown
-        json_match = re.search(r"```json\n(.*)\n```", raw_response_text, re.DOTALL)
-        if json_match:
-            json_text = json_match.group(1)
-        else:
-            # Fallback for cases where the response is just the JSON object
-            json_text = raw_response_text.strip()
+    response = model.generate_content(full_prompt)
+    raw_response_text = response.text
+    logger.debug("Raw Gemini API response: %s", raw_response_text)
+    
+    # Extract JSON from the response text, which may be wrapped in markdown
+    json_match = _JSON_FENCE_RE.search(raw_response_text)
+    if json_match:
+        json_text = json_match.group(1)
+    else:
+        # Fallback for cases where the response is just the JSON object
+        json_text = raw_response_text.strip()
 
-        leads_data = json.loads(json_text)
-        
-        # Return the raw lead data instead of creating Lead objects here
-        leads_to_return = []
-        for lead_data in leads_data:
-            # Basic validation and cleaning
-            if 'username' in lead_data and 'platform' in lead_data:
-                lead_data['followers'] = lead_data.get('followers', 0)
-                lead_data['engagement_score'] = lead_data.get('engagement_score', 0.0)
-                lead_data['tags'] = lead_data.get('tags', [])
-                leads_to_return.append(lead_data)
-        
-        return leads_to_return
-    except Exception as e:
-        flash(f"Error generating leads with Gemini API: {str(e)}", "error")
-        print(f"Gemini API error: {e}")
-        return []
+    leads_data = json.loads(json_text)
+    
+    # Return the raw lead data instead of creating Lead objects here
+    leads_to_return = [lead_data for lead_data in leads_data
+                       if 'username' in lead_data and 'platform' in lead_data]
+    for lead_data in leads_to_return:
+        # Fill in defaults for optional fields
+        lead_data.setdefault('followers', 0)
+        lead_data.setdefault('engagement_score', 0.0)
+        lead_data.setdefault('tags', [])
+    
+    return leads_to_return
 
  # ============================================================================
  # Run Application
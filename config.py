@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -10,22 +11,58 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///leads.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False  # Set to True for SQL query logging
+    SQLALCHEMY_RECORD_QUERIES = False  # Per-query timing bookkeeping, only useful when debugging
+    AUTO_CREATE_TABLES = os.environ.get('AUTO_CREATE_TABLES', 'false').lower() in ['true', 'on', '1']
+    
+    # Connection pool, sized per worker process (keep workers * (size + overflow) under the server's max_connections)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 25)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 25)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        )
+    
+    # Caching (per-process SimpleCache by default; use RedisCache to share across workers)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    CACHE_DIR = os.environ.get('CACHE_DIR')  # Directory used by FileSystemCache
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 30))
+    # Entry cap for SimpleCache; past it, expired then oldest entries (rate-limit counters included) are evicted
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD', 10000))
+    # Lead statistics and tag lists are dropped on every write, so a shared cache can keep them far
+    # longer; a per-process SimpleCache never sees other workers' invalidations
+    STATS_CACHE_TIMEOUT = int(os.environ.get('STATS_CACHE_TIMEOUT',
+                                             CACHE_DEFAULT_TIMEOUT if CACHE_TYPE == 'SimpleCache' else 3600))
+    
+    # Logging (records go through a queue and are written to stderr by a background thread)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    
+    # Compiled template cache (used when not running in debug mode)
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'lead-gen-jinja')
     
     # Pagination
     LEADS_PER_PAGE = 20
     
     # Upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls', 'json'}
+    ALLOWED_EXTENSIONS = frozenset({'csv', 'xlsx', 'xls', 'json'})
     
     # API settings
     API_RATE_LIMIT = int(os.environ.get('API_RATE_LIMIT', 100))
     API_KEY_SECRET = os.environ.get('API_KEY_SECRET') or 'super-secret-api-key-string'
     
+    # Login throttling: attempts allowed per client IP within the window (seconds)
+    LOGIN_RATE_LIMIT = int(os.environ.get('LOGIN_RATE_LIMIT', 10))
+    LOGIN_RATE_LIMIT_WINDOW = int(os.environ.get('LOGIN_RATE_LIMIT_WINDOW', 300))
+    
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
 
-    # Visitor Lead Tracking
+    # Visitor Lead Tracking (repeat visits from one IP update a single lead per fixed window of this many hours)
     VISITOR_LEAD_DUPLICATE_CHECK_HOURS = int(os.environ.get('VISITOR_LEAD_DUPLICATE_CHECK_HOURS', 24))
 
     # Flask-Mail settings
@@ -57,6 +94,8 @@ class Config:
 
     # Google Gemini Integration
     GOOGLE_GEMINI_API_KEY = os.environ.get('GOOGLE_GEMINI_API_KEY')
+    CHAT_HISTORY_WINDOW = int(os.environ.get('CHAT_HISTORY_WINDOW', 20))  # Past messages sent with each AI chat prompt
+    AI_LEADS_WORKERS = int(os.environ.get('AI_LEADS_WORKERS', 4))  # Background threads running Gemini lead generation
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -1,252 +1,89 @@
 # forms.py - WTForms for form validation
 
+import re
+from functools import lru_cache
 from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, IntegerField, FloatField, SelectField, PasswordField, BooleanField
-from wtforms.validators import DataRequired, Email, Optional, URL, NumberRange, Length, ValidationError, EqualTo
-from models import Lead
+from wtforms import Field, StringField, TextAreaField, IntegerField, FloatField, SelectField, PasswordField, BooleanField, SubmitField
+from wtforms.validators import DataRequired, InputRequired, Optional, NumberRange, Length, ValidationError, EqualTo, Regexp
 
-class LeadForm(FlaskForm):
-    """Form for adding/editing leads"""
-    
-    username = StringField('Username', 
-        validators=[
-            DataRequired(message='Username is required'),
-            Length(min=2, max=100, message='Username must be between 2 and 100 characters')
-        ],
-        render_kw={"placeholder": "e.g., @johndoe"}
-    )
-    
-    platform = SelectField('Platform',
-        choices=[
-            ('', 'Select Platform'),
-            ('instagram', 'Instagram'),
-            ('twitter', 'Twitter'),
-            ('linkedin', 'LinkedIn'),
-            ('facebook', 'Facebook'),
-            ('tiktok', 'TikTok'),
-            ('youtube', 'YouTube'),
-            ('pinterest', 'Pinterest'),
-            ('snapchat', 'Snapchat'),
-            ('other', 'Other')
-        ],
-        validators=[DataRequired(message='Platform is required')]
-    )
-    
-    full_name = StringField('Full Name',
-        validators=[
-            Optional(),
-            Length(max=200, message='Full name cannot exceed 200 characters')
-        ],
-        render_kw={"placeholder": "John Doe"}
-    )
-    
-    bio = TextAreaField('Bio',
-        validators=[Optional()],
-        render_kw={"placeholder": "Brief description about the lead...", "rows": 4}
-    )
-    
-    followers = IntegerField('Followers',
-        validators=[
-            Optional(),
-            NumberRange(min=0, max=1000000000, message='Followers must be between 0 and 1 billion')
-        ],
-        default=0,
-        render_kw={"placeholder": "0"}
-    )
-    
-    email = StringField('Email',
-        validators=[
-            Optional(),
-            Email(message='Invalid email address'),
-            Length(max=200, message='Email cannot exceed 200 characters')
-        ],
-        render_kw={"placeholder": "email@example.com"}
-    )
-    
-    website = StringField('Website',
-        validators=[
-            Optional(),
-            URL(message='Invalid URL format'),
-            Length(max=500, message='Website URL cannot exceed 500 characters')
-        ],
-        render_kw={"placeholder": "https://example.com"}
-    )
-    
-    location = StringField('Location',
-        validators=[
-            Optional(),
-            Length(max=200, message='Location cannot exceed 200 characters')
-        ],
-        render_kw={"placeholder": "New York, USA"}
-    )
-    
-    profile_url = StringField('Profile URL',
-        validators=[
-            Optional(),
-            URL(message='Invalid URL format'),
-            Length(max=500, message='Profile URL cannot exceed 500 characters')
-        ],
-        render_kw={"placeholder": "https://instagram.com/username"}
-    )
-    
-    engagement_score = FloatField('Engagement Score',
-        validators=[
-            Optional(),
-            NumberRange(min=0, max=100, message='Engagement score must be between 0 and 100')
-        ],
-        default=0.0,
-        render_kw={"placeholder": "0.0", "step": "0.01"}
-    )
-    
-    tags = StringField('Tags',
-        validators=[Optional()],
-        render_kw={"placeholder": "influencer, tech, marketing (comma-separated)"}
-    )
-    
-    def validate_username(self, field):
-        """Custom validation: Check for duplicate username on same platform"""
-        # Only check during creation (when no lead_id is set)
-        if not hasattr(self, 'lead_id') or self.lead_id is None:
-            existing_lead = Lead.query.filter_by(
-                username=field.data,
-                platform=self.platform.data
-            ).first()
-            
-            if existing_lead:
-                raise ValidationError(
-                    f'A lead with username "{field.data}" already exists on {self.platform.data}'
-                )
-    
-    def set_lead_id(self, lead_id):
-        """Set lead_id for edit mode (to skip duplicate validation)"""
-        self.lead_id = lead_id
+# Validators hold no per-field state, so identical ones are shared across fields
+_OPTIONAL = Optional()
+_REQUIRED = DataRequired()
+_EMAIL_LENGTH = Length(max=254, message='Email cannot exceed 254 characters')
+_SCORE_RANGE = NumberRange(min=0, max=100, message='Engagement score must be between 0 and 100')
 
+# Compiled once at import; shared by the forms' email fields
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_EMAIL_FORMAT = Regexp(_EMAIL_RE, message='Invalid email address.')
 
-class SearchForm(FlaskForm):
-    """Form for searching and filtering leads"""
-    
-    search = StringField('Search',
-        validators=[Optional()],
-        render_kw={"placeholder": "Search username, name, or bio..."}
-    )
-    
-    platform = SelectField('Platform',
-        choices=[
-            ('all', 'All Platforms'),
-            ('instagram', 'Instagram'),
-            ('twitter', 'Twitter'),
-            ('linkedin', 'LinkedIn'),
-            ('facebook', 'Facebook'),
-            ('tiktok', 'TikTok'),
-            ('youtube', 'YouTube'),
-            ('pinterest', 'Pinterest'),
-            ('snapchat', 'Snapchat'),
-            ('other', 'Other')
-        ],
-        default='all'
-    )
-    
-    min_followers = IntegerField('Min Followers',
-        validators=[
-            Optional(),
-            NumberRange(min=0, message='Minimum followers cannot be negative')
-        ],
-        default=0
-    )
-    
-    min_engagement = FloatField('Min Engagement Score',
-        validators=[
-            Optional(),
-            NumberRange(min=0, max=100, message='Engagement score must be between 0 and 100')
-        ],
-        default=0.0
-    )
-    
-    sort_by = SelectField('Sort By',
-        choices=[
-            ('engagement_score', 'Engagement Score'),
-            ('followers', 'Followers'),
-            ('created_at', 'Date Added'),
-            ('last_updated', 'Last Updated'),
-            ('username', 'Username')
-        ],
-        default='engagement_score'
-    )
+# Splits comma-separated tag input, absorbing the whitespace around each comma
+_TAGS_SPLIT_RE = re.compile(r'\s*,\s*')
 
+# http(s) URLs with an optional port, path, query string or fragment
+_URL_RE = re.compile(r'^https?://[A-Za-z0-9.\-]+(?::\d+)?(?:[/?#]\S*)?$')
 
-class BulkActionForm(FlaskForm):
-    """Form for bulk operations"""
-    
-    action = SelectField('Action',
-        choices=[
-            ('', 'Select Action'),
-            ('delete', 'Delete Selected'),
-            ('add_tags', 'Add Tags'),
-            ('remove_tags', 'Remove Tags'),
-            ('export', 'Export Selected')
-        ],
-        validators=[DataRequired(message='Please select an action')]
-    )
-    
-    tags = StringField('Tags',
-        validators=[Optional()],
-        render_kw={"placeholder": "tag1, tag2, tag3"}
-    )
+# Scrape targets may omit the scheme (the scraper adds https://) but need a dotted hostname
+_SCRAPE_URL_RE = re.compile(r'^(?:https?://)?[A-Za-z0-9\-]+(?:\.[A-Za-z0-9\-]+)*\.[A-Za-z]{2,}(?::\d+)?(?:[/?#]\S*)?$')
 
+# Platform options shared by the lead and search forms
+PLATFORM_CHOICES = (
+    ('instagram', 'Instagram'),
+    ('twitter', 'Twitter'),
+    ('linkedin', 'LinkedIn'),
+    ('facebook', 'Facebook'),
+    ('tiktok', 'TikTok'),
+    ('youtube', 'YouTube'),
+    ('pinterest', 'Pinterest'),
+    ('snapchat', 'Snapchat'),
+    ('other', 'Other'),
+)
+LEAD_PLATFORM_CHOICES = (('', 'Select Platform'),) + PLATFORM_CHOICES
+SEARCH_PLATFORM_CHOICES = (('all', 'All Platforms'),) + PLATFORM_CHOICES
+LEAD_PLATFORM_VALUES = frozenset(value for value, _ in LEAD_PLATFORM_CHOICES)
 
-class ImportForm(FlaskForm):
-    """Form for importing leads from file"""
-    
-    duplicate_action = SelectField('Handle Duplicates',
-        choices=[
-            ('skip', 'Skip Duplicates'),
-            ('update', 'Update Existing'),
-            ('create_new', 'Create New Entry')
-        ],
-        default='skip',
-        validators=[DataRequired()]
-    )
 
+def split_tags(text):
+    """Split comma-separated tag input into a list of non-empty tags"""
+    return [tag for tag in _TAGS_SPLIT_RE.split((text or '').strip()) if tag]
 
-class EngagementCalculatorForm(FlaskForm):
-    """Form for calculating engagement scores"""
-    
-    followers = IntegerField('Followers',
-        validators=[
-            DataRequired(message='Followers count is required'),
-            NumberRange(min=1, message='Followers must be at least 1')
-        ],
-        render_kw={"placeholder": "10000"}
-    )
-    
-    avg_likes = IntegerField('Average Likes per Post',
-        validators=[
-            Optional(),
-            NumberRange(min=0, message='Average likes cannot be negative')
-        ],
-        default=0,
-        render_kw={"placeholder": "500"}
-    )
-    
-    avg_comments = IntegerField('Average Comments per Post',
-        validators=[
-            Optional(),
-            NumberRange(min=0, message='Average comments cannot be negative')
-        ],
-        default=0,
-        render_kw={"placeholder": "50"}
-    )
 
+class OptionalFloatField(FloatField):
+    """FloatField that takes its default for blank input instead of failing to parse it"""
+    
+    def process_formdata(self, valuelist):
+        if not valuelist or not valuelist[0]:
+            self.data = self.default() if callable(self.default) else self.default
+            return
+        
+        super().process_formdata(valuelist)
+
+
+@lru_cache(maxsize=None)
+def _choice_values(choices):
+    """Set of the values in a choices tuple, built once per tuple"""
+    return frozenset(value for value, _ in choices)
+
+
+class FrozenSelectField(SelectField):
+    """SelectField with tuple choices that checks submissions against a prebuilt set of their values"""
+    
+    def __init__(self, label=None, validators=None, choices=(), **kwargs):
+        super().__init__(label, validators, choices=choices, **kwargs)
+        self.valid_values = _choice_values(choices)
+        self._built_choices = self.choices
+    
+    def pre_validate(self, form):
+        # SelectField's own check covers validate_choice=False and choices replaced after construction
+        if not self.validate_choice or self.choices is not self._built_choices:
+            return super().pre_validate(form)
+        if self.data not in self.valid_values:
+            raise ValidationError(self.gettext('Not a valid choice.'))
 
-from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, IntegerField, FloatField, SelectField, PasswordField, BooleanField, SubmitField
-from wtforms.validators import DataRequired, Email, Optional, URL, NumberRange, Length, ValidationError, EqualTo
-from models import Lead, User # Import User here
 
 class LeadForm(FlaskForm):
     """Form for adding/editing leads"""
     
-    username = StringField('Username',
+    username = StringField('Username', 
         validators=[
             DataRequired(message='Username is required'),
             Length(min=2, max=100, message='Username must be between 2 and 100 characters')
@@ -254,38 +91,27 @@ class LeadForm(FlaskForm):
         render_kw={"placeholder": "e.g., @johndoe"}
     )
     
-    platform = SelectField('Platform',
-        choices=[
-            ('', 'Select Platform'),
-            ('instagram', 'Instagram'),
-            ('twitter', 'Twitter'),
-            ('linkedin', 'LinkedIn'),
-            ('facebook', 'Facebook'),
-            ('tiktok', 'TikTok'),
-            ('youtube', 'YouTube'),
-            ('pinterest', 'Pinterest'),
-            ('snapchat', 'Snapchat'),
-            ('other', 'Other')
-        ],
+    platform = FrozenSelectField('Platform',
+        choices=LEAD_PLATFORM_CHOICES,
         validators=[DataRequired(message='Platform is required')]
     )
     
     full_name = StringField('Full Name',
         validators=[
-            Optional(),
+            _OPTIONAL,
             Length(max=200, message='Full name cannot exceed 200 characters')
         ],
         render_kw={"placeholder": "John Doe"}
     )
     
     bio = TextAreaField('Bio',
-        validators=[Optional()],
+        validators=[_OPTIONAL],
         render_kw={"placeholder": "Brief description about the lead...", "rows": 4}
     )
     
     followers = IntegerField('Followers',
         validators=[
-            Optional(),
+            _OPTIONAL,
             NumberRange(min=0, max=1000000000, message='Followers must be between 0 and 1 billion')
         ],
         default=0,
@@ -294,25 +120,25 @@ class LeadForm(FlaskForm):
     
     email = StringField('Email',
         validators=[
-            Optional(),
-            Email(message='Invalid email address'),
-            Length(max=200, message='Email cannot exceed 200 characters')
+            _OPTIONAL,
+            Length(max=200, message='Email cannot exceed 200 characters'),
+            _EMAIL_FORMAT
         ],
         render_kw={"placeholder": "email@example.com"}
     )
     
     website = StringField('Website',
         validators=[
-            Optional(),
-            URL(message='Invalid URL format'),
-            Length(max=500, message='Website URL cannot exceed 500 characters')
+            _OPTIONAL,
+            Length(max=500, message='Website URL cannot exceed 500 characters'),
+            Regexp(_URL_RE, message='Invalid URL format')
         ],
         render_kw={"placeholder": "https://example.com"}
     )
     
     location = StringField('Location',
         validators=[
-            Optional(),
+            _OPTIONAL,
             Length(max=200, message='Location cannot exceed 200 characters')
         ],
         render_kw={"placeholder": "New York, USA"}
@@ -320,94 +146,94 @@ class LeadForm(FlaskForm):
     
     profile_url = StringField('Profile URL',
         validators=[
-            Optional(),
-            URL(message='Invalid URL format'),
-            Length(max=500, message='Profile URL cannot exceed 500 characters')
+            _OPTIONAL,
+            Length(max=500, message='Profile URL cannot exceed 500 characters'),
+            Regexp(_URL_RE, message='Invalid URL format')
         ],
         render_kw={"placeholder": "https://instagram.com/username"}
     )
     
-    engagement_score = FloatField('Engagement Score',
+    engagement_score = OptionalFloatField('Engagement Score',
         validators=[
-            Optional(),
-            NumberRange(min=0, max=100, message='Engagement score must be between 0 and 100')
+            _OPTIONAL,
+            _SCORE_RANGE
         ],
         default=0.0,
         render_kw={"placeholder": "0.0", "step": "0.01"}
     )
     
     tags = StringField('Tags',
-        validators=[Optional()],
+        validators=[_OPTIONAL],
         render_kw={"placeholder": "influencer, tech, marketing (comma-separated)"}
     )
     
+    # Set through set_lead_id when editing an existing lead
+    lead_id = None
+    
     def validate_username(self, field):
         """Custom validation: Check for duplicate username on same platform"""
         # Only check during creation (when no lead_id is set)
-        if not hasattr(self, 'lead_id') or self.lead_id is None:
-            existing_lead = Lead.query.filter_by(
-                username=field.data,
-                platform=self.platform.data
-            ).first()
-            
-            if existing_lead:
-                raise ValidationError(
-                    f'A lead with username "{field.data}" already exists on {self.platform.data}'
-                )
+        if self.lead_id is not None:
+            return
+        
+        # Skip the database lookup when the cheaper field checks have already failed
+        # (platform is validated after username, so check its value here)
+        if field.errors or not self.platform.data or self.platform.data not in LEAD_PLATFORM_VALUES:
+            return
+        
+        from models import LeadManager
+        if LeadManager.exists_cached(field.data, self.platform.data):
+            raise ValidationError(
+                f'A lead with username "{field.data}" already exists on {self.platform.data}'
+            )
     
     def set_lead_id(self, lead_id):
         """Set lead_id for edit mode (to skip duplicate validation)"""
         self.lead_id = lead_id
+    
+    @property
+    def parsed_tags(self):
+        """Tags field split into a list"""
+        return split_tags(self.tags.data)
 
 
 class SearchForm(FlaskForm):
     """Form for searching and filtering leads"""
     
     search = StringField('Search',
-        validators=[Optional()],
+        validators=[_OPTIONAL],
         render_kw={"placeholder": "Search username, name, or bio..."}
     )
     
-    platform = SelectField('Platform',
-        choices=[
-            ('all', 'All Platforms'),
-            ('instagram', 'Instagram'),
-            ('twitter', 'Twitter'),
-            ('linkedin', 'LinkedIn'),
-            ('facebook', 'Facebook'),
-            ('tiktok', 'TikTok'),
-            ('youtube', 'YouTube'),
-            ('pinterest', 'Pinterest'),
-            ('snapchat', 'Snapchat'),
-            ('other', 'Other')
-        ],
+    platform = FrozenSelectField('Platform',
+        choices=SEARCH_PLATFORM_CHOICES,
         default='all'
     )
     
     min_followers = IntegerField('Min Followers',
         validators=[
-            Optional(),
+            _OPTIONAL,
             NumberRange(min=0, message='Minimum followers cannot be negative')
         ],
         default=0
     )
     
-    min_engagement = FloatField('Min Engagement Score',
+    min_engagement = OptionalFloatField('Min Engagement Score',
         validators=[
-            Optional(),
-            NumberRange(min=0, max=100, message='Engagement score must be between 0 and 100')
+            _OPTIONAL,
+            _SCORE_RANGE
         ],
         default=0.0
     )
     
-    sort_by = SelectField('Sort By',
-        choices=[
+    sort_by = FrozenSelectField('Sort By',
+        choices=(
             ('engagement_score', 'Engagement Score'),
             ('followers', 'Followers'),
             ('created_at', 'Date Added'),
             ('last_updated', 'Last Updated'),
-            ('username', 'Username')
-        ],
+            ('username', 'Username'),
+        ),
         default='engagement_score'
     )
 
@@ -415,34 +241,39 @@ class SearchForm(FlaskForm):
 class BulkActionForm(FlaskForm):
     """Form for bulk operations"""
     
-    action = SelectField('Action',
-        choices=[
+    action = FrozenSelectField('Action',
+        choices=(
             ('', 'Select Action'),
             ('delete', 'Delete Selected'),
             ('add_tags', 'Add Tags'),
             ('remove_tags', 'Remove Tags'),
-            ('export', 'Export Selected')
-        ],
+            ('export', 'Export Selected'),
+        ),
         validators=[DataRequired(message='Please select an action')]
     )
     
     tags = StringField('Tags',
-        validators=[Optional()],
+        validators=[_OPTIONAL],
         render_kw={"placeholder": "tag1, tag2, tag3"}
     )
+    
+    @property
+    def parsed_tags(self):
+        """Tags field split into a list"""
+        return split_tags(self.tags.data)
 
 
 class ImportForm(FlaskForm):
     """Form for importing leads from file"""
     
-    duplicate_action = SelectField('Handle Duplicates',
-        choices=[
+    duplicate_action = FrozenSelectField('Handle Duplicates',
+        choices=(
             ('skip', 'Skip Duplicates'),
             ('update', 'Update Existing'),
-            ('create_new', 'Create New Entry')
-        ],
+            ('create_new', 'Create New Entry'),
+        ),
         default='skip',
-        validators=[DataRequired()]
+        validators=[_REQUIRED]
     )
 
 
@@ -459,7 +290,7 @@ class EngagementCalculatorForm(FlaskForm):
     
     avg_likes = IntegerField('Average Likes per Post',
         validators=[
-            Optional(),
+            _OPTIONAL,
             NumberRange(min=0, message='Average likes cannot be negative')
         ],
         default=0,
@@ -468,7 +299,7 @@ class EngagementCalculatorForm(FlaskForm):
     
     avg_comments = IntegerField('Average Comments per Post',
         validators=[
-            Optional(),
+            _OPTIONAL,
             NumberRange(min=0, message='Average comments cannot be negative')
         ],
         default=0,
@@ -476,74 +307,108 @@ class EngagementCalculatorForm(FlaskForm):
     )
 
 
+class IntegerListField(Field):
+    """Field holding a list of integers, e.g. a JSON array of ids"""
+    
+    def process_formdata(self, valuelist):
+        try:
+            self.data = [int(value) for value in valuelist]
+        except ValueError:
+            self.data = None
+            raise ValueError('Must be a list of integers')
+
+
+class LeadUpdateAPIForm(FlaskForm):
+    """Validates JSON bodies sent to the lead update API"""
+    username = StringField('Username', validators=[_OPTIONAL, Length(min=2, max=100)])
+    platform = StringField('Platform', validators=[_OPTIONAL, Length(max=50)])
+    email = StringField('Email', validators=[_OPTIONAL, Length(max=200), _EMAIL_FORMAT])
+    website = StringField('Website', validators=[_OPTIONAL, Length(max=500), Regexp(_URL_RE, message='Invalid URL format')])
+    followers = IntegerField('Followers', validators=[_OPTIONAL, NumberRange(min=0)])
+
+
+class LeadAPIForm(LeadUpdateAPIForm):
+    """Validates JSON bodies sent to the lead create API"""
+    username = StringField('Username', validators=[DataRequired(message='Username is required'), Length(min=2, max=100)])
+    platform = StringField('Platform', validators=[DataRequired(message='Platform is required'), Length(max=50)])
+
+
+class BulkDeleteAPIForm(FlaskForm):
+    """Validates JSON bodies sent to the bulk delete API"""
+    lead_ids = IntegerListField('Lead IDs', validators=[InputRequired(message='lead_ids array is required')])
+
+
 class RegistrationForm(FlaskForm):
-    username = StringField('Username', validators=[DataRequired()])
-    email = StringField('Email', validators=[DataRequired(), Email()])
-    password = PasswordField('Password', validators=[DataRequired()])
+    username = StringField('Username', validators=[_REQUIRED])
+    email = StringField('Email', validators=[_REQUIRED, _EMAIL_LENGTH, _EMAIL_FORMAT])
+    password = PasswordField('Password', validators=[_REQUIRED])
     password2 = PasswordField('Confirm Password',
-                             validators=[DataRequired(), EqualTo('password', message='Passwords must match')])
+                             validators=[_REQUIRED, EqualTo('password', message='Passwords must match')])
     submit = SubmitField('Register')
     
-    def validate_username(self, username):
-        user = User.query.filter_by(username=username.data).first()
-        if user:
-            raise ValidationError('Username already taken. Please choose a different one.')
-    
-    def validate_email(self, email):
-        user = User.query.filter_by(email=email.data).first()
-        if user:
-            raise ValidationError('Email already registered. Please use a different one.')
+    def validate(self, extra_validators=None):
+        """Run the field checks, then look up the username and email together"""
+        if not super().validate(extra_validators):
+            return False
+        
+        return self.check_available()
+    
+    def check_available(self, use_cache=True):
+        """Flag the username and email fields if either is already registered"""
+        from models import User
+        username_taken, email_taken = User.find_taken(self.username.data, self.email.data, use_cache)
+        if username_taken:
+            self.username.errors.append('Username already taken. Please choose a different one.')
+        if email_taken:
+            self.email.errors.append('Email already registered. Please use a different one.')
+        
+        return not (username_taken or email_taken)
 
 class LoginForm(FlaskForm):
     """Form for user login"""
-    email = StringField('Email', validators=[DataRequired(), Email()])
-    password = PasswordField('Password', validators=[DataRequired()])
+    email = StringField('Email', validators=[_REQUIRED, _EMAIL_LENGTH, _EMAIL_FORMAT])
+    password = PasswordField('Password', validators=[_REQUIRED])
     remember = BooleanField('Remember Me')
 
 class ProfileForm(FlaskForm):
     """Form for updating user profile"""
-    username = StringField('Username', validators=[DataRequired(), Length(min=4, max=80)])
-    email = StringField('Email', validators=[DataRequired(), Email()])
+    username = StringField('Username', validators=[_REQUIRED, Length(min=4, max=80)])
+    email = StringField('Email', validators=[_REQUIRED, _EMAIL_LENGTH, _EMAIL_FORMAT])
 
 class NoteForm(FlaskForm):
     """Form for adding notes to leads"""
-    content = TextAreaField('Note Content', validators=[DataRequired(), Length(min=1, max=500)])
-    note_type = SelectField('Note Type',
-        choices=[
+    content = TextAreaField('Note Content', validators=[_REQUIRED, Length(min=1, max=500)])
+    note_type = FrozenSelectField('Note Type',
+        choices=(
             ('general', 'General'),
             ('call', 'Call'),
             ('meeting', 'Meeting'),
-            ('email', 'Email')
-        ],
+            ('email', 'Email'),
+        ),
         default='general',
-        validators=[DataRequired()]
+        validators=[_REQUIRED]
     )
     is_important = BooleanField('Important')
 
 class GeminiLeadGenerationForm(FlaskForm):
     """Form for generating leads using Google Gemini API"""
     prompt = TextAreaField('Lead Generation Prompt',
-        validators=[DataRequired(), Length(min=10, max=1000)],
+        validators=[_REQUIRED, Length(min=10, max=1000)],
         render_kw={"placeholder": "e.g., 'influencers in tech in Silicon Valley with over 10k followers'", "rows": 5}
     )
     submit = SubmitField('Generate Leads')
 
 class UserSearchForm(FlaskForm):
     """Form for searching users"""
-    search = StringField('Search', validators=[Optional()], render_kw={"placeholder": "Search username or email..."})
+    search = StringField('Search', validators=[_OPTIONAL], render_kw={"placeholder": "Search username or email..."})
 
 class ScrapeLeadsForm(FlaskForm):
     """Form for web scraping leads from a URL"""
     url = StringField('URL to Scrape',
-        validators=[DataRequired(message='URL is required')],
+        validators=[
+            DataRequired(message='URL is required'),
+            Regexp(_SCRAPE_URL_RE, message='Enter a web address such as www.example.com')
+        ],
         render_kw={"placeholder": "e.g., https://example.com/leads-page or www.example.com"}
     )
     submit = SubmitField('Scrape Leads')
-
-class GeminiLeadGenerationForm(FlaskForm):
-    """Form for generating leads using Google Gemini API"""
-    prompt = TextAreaField('Lead Generation Prompt',
-        validators=[DataRequired(), Length(min=10, max=1000)],
-        render_kw={"placeholder": "e.g., 'influencers in tech in Silicon Valley with over 10k followers'", "rows": 5}
-    )
-    submit = SubmitField('Generate Leads')
\ No newline at end of file
@@ -0,0 +1,37 @@
+# gunicorn.conf.py - Production server settings
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+
+# Import the app once in the master; workers share that memory copy-on-write
+preload_app = True
+
+# Cache backends that live inside one process and so are not shared between workers
+PROCESS_LOCAL_CACHE_TYPES = {'simple', 'simplecache', 'null', 'nullcache'}
+
+
+def on_starting(server):
+    """Refuse to start several workers on a per-process cache"""
+    from wsgi import app
+
+    cache_type = app.config['CACHE_TYPE'].rsplit('.', 1)[-1].lower()
+    if server.cfg.workers > 1 and cache_type in PROCESS_LOCAL_CACHE_TYPES:
+        # Pending scraped/AI leads and job state are read back by whichever worker takes the next request
+        raise RuntimeError(
+            f"CACHE_TYPE={app.config['CACHE_TYPE']} is per-process and cannot be shared by "
+            f"{server.cfg.workers} workers; configure RedisCache (CACHE_REDIS_URL) or "
+            "FileSystemCache (CACHE_DIR), or set GUNICORN_WORKERS=1"
+        )
+
+
+def post_fork(server, worker):
+    """Drop pooled DB connections inherited from the master process"""
+    from wsgi import app
+    from models import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
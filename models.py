@@ -1,12 +1,115 @@
 # models.py - Database models and operations
 
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
+from sqlalchemy import DDL, bindparam, event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, defer, make_transient_to_detached
+from cachetools import TTLCache
 from datetime import datetime
+from functools import lru_cache, wraps
+from inspect import signature
+import base64
+import hashlib
 import json
-from werkzeug.security import generate_password_hash, check_password_hash
+import orjson
+import secrets
+import threading
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from flask import current_app, g, has_app_context, has_request_context
 from flask_login import UserMixin
 
 db = SQLAlchemy()
+cache = Cache()
+
+# The trigram search indexes below need pg_trgm; other databases skip them
+event.listen(db.metadata, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+# Argon2id hasher; the C extension releases the GIL while hashing
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+
+# Checked against when a login names an unknown user, keeping response times uniform
+DUMMY_PASSWORD_HASH = password_hasher.hash('not-a-real-password')
+
+# Usernames per IN (...) lookup when checking imports for existing leads
+IMPORT_LOOKUP_BATCH_SIZE = 500
+
+# Lead ids per DELETE ... WHERE id IN (...), keeping bulk deletes under bind-parameter limits
+DELETE_BATCH_SIZE = 1000
+
+# Rows per executemany INSERT when importing leads
+INSERT_BATCH_SIZE = 1000
+
+# Short-lived cache of user rows for Flask-Login's per-request user loader
+_user_cache = TTLCache(maxsize=10000, ttl=30)
+_user_cache_lock = threading.Lock()
+
+# Seconds a duplicate-username/email check result is reused by form validation
+EXISTS_CACHE_TIMEOUT = 30
+
+# Seconds a valid API key's owner and expiry are reused by require_api_key
+API_KEY_CACHE_TIMEOUT = 60
+
+# Seconds a page of serialized API search results is reused (writes invalidate it sooner)
+SEARCH_CACHE_TIMEOUT = 30
+
+
+def cached_exists(cache_key, query):
+    """Run an EXISTS check for query, reusing the result for EXISTS_CACHE_TIMEOUT seconds"""
+    found = cache.get(cache_key)
+    if found is None:
+        found = db.session.query(query.exists()).scalar()
+        cache.set(cache_key, found, timeout=EXISTS_CACHE_TIMEOUT)
+    return found
+
+
+@lru_cache(maxsize=4096)
+def _decode_json_list(raw):
+    """Decode a JSON list column, memoized on the raw string; a tuple so the cached value can't be mutated"""
+    try:
+        value = orjson.loads(raw)
+    except ValueError:
+        return ()
+    return tuple(value) if isinstance(value, list) else ()
+
+
+def json_list(raw):
+    """Python list for a JSON list column (tags, tech_stack); repeated values skip decoding"""
+    return list(_decode_json_list(raw)) if raw else []
+
+
+def dump_json_list(value):
+    """Text for a JSON list column, encoded with orjson"""
+    return orjson.dumps(value).decode('utf-8')
+
+
+def request_cached(func):
+    """Reuse a lead query's result for identical calls later in the same request"""
+    params = signature(func)
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not has_request_context():
+            return func(*args, **kwargs)
+        # Bind against the signature so positional, keyword and defaulted calls share a key
+        bound = params.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__, json.dumps(bound.arguments, sort_keys=True, default=str))
+        memo = g.setdefault('_lead_cache', {})
+        if key not in memo:
+            memo[key] = func(*args, **kwargs)
+        return memo[key]
+    return wrapper
+
+
+def clear_request_cache():
+    """Forget request_cached results, e.g. after leads were written"""
+    if has_app_context():
+        g.pop('_lead_cache', None)
+
 
 class User(db.Model, UserMixin):
     """User model for authentication"""
@@ -15,17 +118,100 @@ class User(db.Model, UserMixin):
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
+    email = db.Column(db.String(254), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
     member_since = db.Column(db.DateTime, default=datetime.utcnow)
     
     leads = db.relationship('Lead', backref='owner', lazy=True)
     
+    __table_args__ = (
+        # Case-insensitive lookups on login hit this index instead of scanning
+        db.Index('ix_users_email_lower', db.func.lower(email), unique=True),
+        # Trigram indexes let PostgreSQL serve ILIKE '%term%' user searches
+        db.Index('ix_users_username_trgm', username, postgresql_using='gin',
+                 postgresql_ops={'username': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_users_email_trgm', email, postgresql_using='gin',
+                 postgresql_ops={'email': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+    
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    @staticmethod
+    def get_cached(user_id):
+        """Load a user by ID, serving recently loaded rows from an in-process cache"""
+        with _user_cache_lock:
+            row = _user_cache.get(user_id)
+        
+        if row is None:
+            user = db.session.get(User, user_id)
+            if user is not None:
+                with _user_cache_lock:
+                    _user_cache[user_id] = {c.key: getattr(user, c.key) for c in User.__table__.columns}
+            return user
+        
+        # Rebuild a clean, persistent instance in the current session without a SELECT
+        user = User(**row)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    @staticmethod
+    def invalidate_cache(user_id):
+        """Drop a cached user row after it has been modified"""
+        with _user_cache_lock:
+            _user_cache.pop(user_id, None)
+    
+    @staticmethod
+    def username_exists_key(username):
+        return f'user_exists:username:{username}'
+    
+    @staticmethod
+    def email_exists_key(email):
+        return f'user_exists:email:{(email or "").strip().lower()}'
+    
+    @staticmethod
+    def find_taken(username, email, use_cache=True):
+        """
+        Check a username and (case-insensitive) email for registration in one query
+        use_cache=False skips cached answers, e.g. after a registration lost a race
+        Returns: (username_taken, email_taken)
+        """
+        email = email.strip().lower()
+        keys = (User.username_exists_key(username), User.email_exists_key(email))
+        if use_cache:
+            cached = cache.get_many(*keys)
+            if None not in cached:
+                return tuple(cached)
+        
+        rows = db.session.query(User.username, db.func.lower(User.email)).filter(
+            (User.username == username) | (db.func.lower(User.email) == email)
+        ).all()
+        username_taken = any(row[0] == username for row in rows)
+        email_taken = any(row[1] == email for row in rows)
+        
+        cache.set_many({keys[0]: username_taken, keys[1]: email_taken}, timeout=EXISTS_CACHE_TIMEOUT)
+        return username_taken, email_taken
+
+def verify_password(password_hash, password):
+    """Check a password against an Argon2 or legacy Werkzeug hash"""
+    if not password_hash:
+        return False
+    
+    if not password_hash.startswith('$argon2'):
+        return check_password_hash(password_hash, password)
+    
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def password_needs_rehash(password_hash):
+    """True for legacy Werkzeug hashes and Argon2 hashes made with other parameters"""
+    return not password_hash.startswith('$argon2') or password_hasher.check_needs_rehash(password_hash)
+
 
 class Lead(db.Model):
     """Lead model for storing social media contact information"""
@@ -35,7 +221,7 @@ class Lead(db.Model):
     # Primary fields
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    username = db.Column(db.String(100), nullable=False, index=True)
+    username = db.Column(db.String(100), nullable=False)
     platform = db.Column(db.String(50), nullable=False, index=True)
     
     # Profile information
@@ -56,6 +242,9 @@ class Lead(db.Model):
     job_title = db.Column(db.String(200))
     tech_stack = db.Column(db.Text) # Stored as JSON string of technologies
 
+    # Website visitor tracking (see api_track_visitor)
+    visitor_ip = db.Column(db.String(45)) # IPv4/IPv6 address of the visitor
+
     # CRM Integration
     salesforce_id = db.Column(db.String(200), unique=True, nullable=True)
     hubspot_id = db.Column(db.String(200), unique=True, nullable=True)
@@ -63,8 +252,9 @@ class Lead(db.Model):
     # Metrics
     engagement_score = db.Column(db.Float, default=0.0, index=True)
     
-    # Tags (stored as JSON)
+    # Tags (stored as JSON, mirrored one row per tag in lead_tags for indexed lookups)
     tags = db.Column(db.Text, default='[]')
+    tag_rows = db.relationship('LeadTag', lazy=True, cascade='all, delete-orphan')
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -72,6 +262,23 @@ class Lead(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'username', 'platform', name='_user_username_platform_uc'),
+        # Duplicate checks that match on username/platform without a user (e.g. api_create_lead);
+        # also serves username-only lookups
+        db.Index('ix_leads_username_platform', username, platform),
+        # Match search_leads: user (and optional platform) equality, then the sort column
+        db.Index('ix_leads_user_engagement', user_id, engagement_score.desc()),
+        db.Index('ix_leads_user_platform_engagement', user_id, platform, engagement_score.desc()),
+        db.Index('ix_leads_user_followers', user_id, followers.desc()),
+        db.Index('ix_leads_user_created_at', user_id, created_at.desc()),
+        # Trigram indexes let PostgreSQL serve the ILIKE '%term%' filters in search_leads
+        db.Index('ix_leads_username_trgm', username, postgresql_using='gin',
+                 postgresql_ops={'username': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_leads_full_name_trgm', full_name, postgresql_using='gin',
+                 postgresql_ops={'full_name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_leads_bio_trgm', bio, postgresql_using='gin',
+                 postgresql_ops={'bio': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_leads_email_trgm', email, postgresql_using='gin',
+                 postgresql_ops={'email': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
     )
     
     def __repr__(self):
@@ -80,21 +287,61 @@ class Lead(db.Model):
     @property
     def tags_list(self):
         """Return tags as a Python list"""
-        try:
-            return json.loads(self.tags) if self.tags else []
-        except:
-            return []
+        return json_list(self.tags)
     
     @tags_list.setter
     def tags_list(self, value):
         """Set tags from a Python list"""
+        tags = Lead.parse_tags(value)
+        self.tags = dump_json_list(tags)
+        
+        # Keep the lead_tags rows in step, reusing rows for tags that stay
+        existing = {row.tag: row for row in self.tag_rows}
+        self.tag_rows = [existing.get(tag) or LeadTag(tag=tag) for tag in Lead.tag_row_values(tags)]
+    
+    @staticmethod
+    def parse_tags(value):
+        """Tags as a list, from a list or a comma-separated string"""
         if isinstance(value, list):
-            self.tags = json.dumps(value)
-        elif isinstance(value, str):
-            # Handle comma-separated string
-            self.tags = json.dumps([tag.strip() for tag in value.split(',') if tag.strip()])
-        else:
-            self.tags = '[]'
+            return value
+        if isinstance(value, str):
+            return [tag.strip() for tag in value.split(',') if tag.strip()]
+        return []
+    
+    @staticmethod
+    def tag_row_values(tags):
+        """Distinct tags as stored in lead_tags, truncated to fit the column"""
+        return list(dict.fromkeys(str(tag)[:LeadTag.MAX_LENGTH] for tag in tags))
+    
+    @staticmethod
+    def sync_tag_rows():
+        """
+        Rebuild the lead_tags rows from each lead's stored tags, e.g. for leads
+        created before lead_tags existed
+        Returns: number of leads synced
+        """
+        leads_table = Lead.__table__
+        tags_table = LeadTag.__table__
+        count = 0
+        owners = set()
+        
+        db.session.execute(tags_table.delete())
+        result = db.session.execute(
+            db.select(leads_table.c.id, leads_table.c.user_id, leads_table.c.tags)
+            .execution_options(yield_per=INSERT_BATCH_SIZE))
+        for rows in result.partitions():
+            tag_rows = [{'lead_id': row.id, 'tag': tag}
+                        for row in rows
+                        for tag in Lead.tag_row_values(json_list(row.tags))]
+            if tag_rows:
+                db.session.execute(tags_table.insert(), tag_rows)
+            owners.update(row.user_id for row in rows)
+            count += len(rows)
+        db.session.commit()
+        
+        # Core statements bypass the ORM flush hooks, so invalidate caches explicitly
+        Lead.invalidate_cache(*owners)
+        return count
     
     def to_dict(self):
         """Convert lead to dictionary for API responses"""
@@ -113,14 +360,31 @@ class Lead(db.Model):
             'company_industry': self.company_industry,
             'company_size': self.company_size,
             'job_title': self.job_title,
-            'tech_stack': json.loads(self.tech_stack) if self.tech_stack else [],
+            'tech_stack': json_list(self.tech_stack),
             'engagement_score': self.engagement_score,
             'tags': self.tags_list,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'last_updated': self.last_updated.isoformat() if self.last_updated else None
         }
     
+    # Columns read by row_to_dict; mirrors the keys to_dict returns
+    API_COLUMNS = ('id', 'username', 'platform', 'full_name', 'bio', 'followers', 'email',
+                   'website', 'location', 'profile_url', 'company_name', 'company_industry',
+                   'company_size', 'job_title', 'tech_stack', 'engagement_score', 'tags',
+                   'created_at', 'last_updated')
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Convert a Core result mapping of API_COLUMNS to the same dict as to_dict"""
+        data = {name: row[name] for name in Lead.API_COLUMNS}
+        data['tech_stack'] = json_list(data['tech_stack'])
+        data['tags'] = json_list(data['tags'])
+        data['created_at'] = data['created_at'].isoformat() if data['created_at'] else None
+        data['last_updated'] = data['last_updated'].isoformat() if data['last_updated'] else None
+        return data
+    
     @staticmethod
+    @lru_cache(maxsize=4096)
     def calculate_engagement_score(followers, likes_avg=0, comments_avg=0):
         """Calculate engagement score (0-100)"""
         if followers == 0:
@@ -133,12 +397,115 @@ class Lead(db.Model):
         return round(min(100, score + follower_bonus), 2)
     
     @staticmethod
+    @request_cached
     def search_leads(user_id, query=None, platform=None, min_followers=0, min_engagement=0.0,
-                    tags=None, limit=100, offset=0, order_by='engagement_score'):
+                    tags=None, limit=100, offset=0, order_by='engagement_score', detail=True):
         """
         Advanced search with multiple filters
+        detail=False skips the bio and tech_stack text columns, for list views that don't show them
         Returns tuple: (leads, total_count)
         """
+        q = Lead.search_leads_query(user_id, query, platform, min_followers, min_engagement,
+                                    tags, order_by)
+        if not detail:
+            q = Lead._defer_columns(q, Lead.bio, Lead.tech_stack)
+        
+        # The total rides along on every row as a window count, saving a separate COUNT query
+        rows = q.add_columns(db.func.count().over().label('total')).limit(limit).offset(offset).all()
+        if not rows:
+            return [], Lead._count_past_end(q, offset)
+        
+        return [lead for lead, _ in rows], rows[0].total
+    
+    @staticmethod
+    def _defer_columns(q, *columns):
+        """Leave columns out of the SELECT; touching them on a loaded lead raises instead of lazy-loading"""
+        return q.options(*(defer(column, raiseload=True) for column in columns))
+    
+    @staticmethod
+    def _count_past_end(q, offset):
+        """Total for an empty page, which carries no window count"""
+        return q.order_by(None).count() if offset else 0
+    
+    @staticmethod
+    def search_rows(user_id, limit=100, offset=0, order_by='engagement_score', **filters):
+        """
+        search_leads for serialization: reads plain rows instead of hydrating Lead objects
+        Returns tuple: (list of dicts shaped like Lead.to_dict, total_count)
+        """
+        params = {'limit': limit, 'offset': offset, 'order_by': order_by, **filters}
+        return Lead._cached_search(user_id, 'rows', params,
+                                   lambda: Lead._search_rows(user_id, limit, offset, order_by, **filters))
+    
+    @staticmethod
+    def _search_rows(user_id, limit, offset, order_by, **filters):
+        """Uncached search_rows"""
+        q = Lead.search_leads_query(user_id, order_by=order_by, **filters)
+        
+        columns = [Lead.__table__.c[name] for name in Lead.API_COLUMNS]
+        stmt = q.with_entities(*columns, db.func.count().over().label('total')).limit(limit).offset(offset).statement
+        rows = db.session.execute(stmt).mappings().all()
+        if not rows:
+            return [], Lead._count_past_end(q, offset)
+        
+        return [Lead.row_to_dict(row) for row in rows], rows[0]['total']
+    
+    @staticmethod
+    def search_rows_page(user_id, after=None, limit=100, order_by='engagement_score', **filters):
+        """
+        search_leads_page for serialization: reads plain rows instead of hydrating Lead objects
+        Returns tuple: (list of dicts shaped like Lead.to_dict, next_cursor)
+        """
+        params = {'after': after, 'limit': limit, 'order_by': order_by, **filters}
+        return Lead._cached_search(user_id, 'page', params,
+                                   lambda: Lead._search_rows_page(user_id, after, limit, order_by, **filters))
+    
+    @staticmethod
+    def _search_rows_page(user_id, after, limit, order_by, **filters):
+        """Uncached search_rows_page"""
+        q = Lead._after_cursor(Lead.search_leads_query(user_id, order_by=order_by, **filters),
+                               after, order_by)
+        
+        sort_key = Lead._sort_column(order_by).key
+        columns = [Lead.__table__.c[name] for name in Lead.API_COLUMNS]
+        if sort_key not in Lead.API_COLUMNS:
+            columns.append(Lead.__table__.c[sort_key])
+        stmt = q.with_entities(*columns).limit(limit + 1).statement
+        rows = db.session.execute(stmt).mappings().all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = Lead._make_cursor(rows[-1][sort_key], rows[-1]['id'])
+        return [Lead.row_to_dict(row) for row in rows], next_cursor
+    
+    @staticmethod
+    def _cached_search(user_id, kind, params, load):
+        """
+        Serve a serialized search result from cache for SEARCH_CACHE_TIMEOUT seconds
+        Keys include the user's search version, which invalidate_cache drops on every write
+        """
+        version_key = f'lead_search_version:{user_id}'
+        version = cache.get(version_key)
+        if version is None:
+            version = secrets.token_hex(8)
+            cache.set(version_key, version, timeout=0)
+        
+        digest = hashlib.blake2b(json.dumps(params, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+        cache_key = f'lead_search:{user_id}:{version}:{kind}:{digest}'
+        result = cache.get(cache_key)
+        if result is None:
+            result = load()
+            cache.set(cache_key, result, timeout=SEARCH_CACHE_TIMEOUT)
+        return result
+    
+    @staticmethod
+    def search_leads_query(user_id, query=None, platform=None, min_followers=0, min_engagement=0.0,
+                           tags=None, order_by='engagement_score'):
+        """
+        Build the filtered, ordered search query without executing it
+        Returns: Query, so callers can paginate or stream the results
+        """
         # Base query
         q = Lead.query.filter_by(user_id=user_id)
         
@@ -166,59 +533,173 @@ class Lead(db.Model):
         if tags:
             # Search for tags in JSON field
             for tag in tags if isinstance(tags, list) else [tags]:
-                q = q.filter(Lead.tags.contains(tag))
+                q = q.filter(Lead.tag_rows.any(LeadTag.tag == tag))
+        
+        # Apply ordering; id breaks ties so pages (and keyset cursors) are stable
+        return q.order_by(Lead._sort_column(order_by).desc(), Lead.id.desc())
+    
+    @staticmethod
+    def search_leads_page(user_id, after=None, limit=100, order_by='engagement_score', **filters):
+        """
+        Keyset-paginated search: the rows following the (sort_value, id) cursor
+        Returns tuple: (leads, next_cursor), next_cursor is None on the last page
+        """
+        q = Lead._after_cursor(Lead.search_leads_query(user_id, order_by=order_by, **filters),
+                               after, order_by)
+        
+        # Fetch one extra row to learn whether another page exists without a COUNT
+        leads = q.limit(limit + 1).all()
+        if len(leads) <= limit:
+            return leads, None
         
-        # Get total count before pagination
-        total_count = q.count()
+        leads = leads[:limit]
+        return leads, Lead.encode_cursor(leads[-1], order_by)
+    
+    @staticmethod
+    def _after_cursor(q, after, order_by):
+        """Restrict a search query to the rows following the decoded (sort_value, id) cursor"""
+        if after is None:
+            return q
+        sort_value, last_id = after
+        order_column = Lead._sort_column(order_by)
+        return q.filter(db.or_(
+            order_column < sort_value,
+            db.and_(order_column == sort_value, Lead.id < last_id)
+        ))
+    
+    @staticmethod
+    def encode_cursor(lead, order_by='engagement_score'):
+        """Encode a lead's position in the sort order as an opaque URL-safe cursor"""
+        return Lead._make_cursor(getattr(lead, Lead._sort_column(order_by).key), lead.id)
+    
+    @staticmethod
+    def _make_cursor(sort_value, lead_id):
+        """Cursor for a row at sort_value/lead_id; see encode_cursor"""
+        if isinstance(sort_value, datetime):
+            sort_value = sort_value.isoformat()
+        payload = json.dumps([sort_value, lead_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+    
+    @staticmethod
+    def decode_cursor(cursor, order_by='engagement_score'):
+        """
+        Decode a cursor made by encode_cursor
+        Returns tuple: (sort_value, id); raises ValueError if malformed or tampered with
+        """
+        column_type = Lead._sort_column(order_by).type
+        try:
+            sort_value, lead_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if isinstance(column_type, db.DateTime):
+                sort_value = datetime.fromisoformat(sort_value)
+            elif sort_value is not None and not Lead._is_cursor_value(sort_value, column_type):
+                raise ValueError('Cursor value does not match the sort column')
+            if not Lead._is_cursor_value(lead_id, Lead.id.type):
+                raise ValueError('Cursor id is not an integer')
+        except (TypeError, ValueError) as e:
+            raise ValueError('Invalid cursor') from e
+        return sort_value, lead_id
+    
+    @staticmethod
+    def _is_cursor_value(value, column_type):
+        """Whether a decoded JSON value can be compared against a column of column_type"""
+        if isinstance(value, bool):
+            return False
+        if isinstance(column_type, db.Integer):
+            return isinstance(value, int)
+        if isinstance(column_type, db.Float):
+            return isinstance(value, (int, float))
+        return isinstance(value, str)
+    
+    @staticmethod
+    def _sort_column(order_by):
+        """Resolve a sort_by name to a Lead column, defaulting to engagement score"""
+        column = getattr(Lead, order_by, None)
+        if not isinstance(getattr(column, 'property', None), db.ColumnProperty):
+            return Lead.engagement_score
+        return column
+    
+    @staticmethod
+    @request_cached
+    def get_statistics(user_id, with_recent=True):
+        """Get database statistics, serving the aggregates from cache when fresh"""
+        cache_key = f'lead_stats:{user_id}'
+        stats = cache.get(cache_key)
+        if stats is None:
+            stats = Lead._compute_statistics(user_id)
+            cache.set(cache_key, stats, timeout=current_app.config['STATS_CACHE_TIMEOUT'])
         
-        # Apply ordering
-        order_column = getattr(Lead, order_by, Lead.engagement_score)
-        q = q.order_by(order_column.desc())
+        stats = dict(stats)
+        if not with_recent:
+            return stats
         
-        # Apply pagination
-        leads = q.limit(limit).offset(offset).all()
+        # Recent leads are ORM objects, so load them fresh rather than caching them
+        stats['recent_leads'] = Lead.query.filter_by(user_id=user_id).order_by(Lead.created_at.desc()).limit(5).all()
         
-        return leads, total_count
+        return stats
     
     @staticmethod
-    def get_statistics(user_id):
-        """Get database statistics"""
+    def get_statistics_dict(user_id):
+        """get_statistics with recent leads serialized, cached whole for the JSON API"""
+        cache_key = f'lead_stats_api:{user_id}'
+        stats = cache.get(cache_key)
+        if stats is None:
+            stats = dict(Lead.get_statistics(user_id, with_recent=False))
+            columns = [Lead.__table__.c[name] for name in Lead.API_COLUMNS]
+            recent = db.select(*columns).where(Lead.user_id == user_id).order_by(Lead.created_at.desc()).limit(5)
+            stats['recent_leads'] = [Lead.row_to_dict(row) for row in db.session.execute(recent).mappings()]
+            cache.set(cache_key, stats, timeout=current_app.config['STATS_CACHE_TIMEOUT'])
+        return stats
+    
+    @staticmethod
+    def invalidate_cache(*user_ids):
+        """Drop cached statistics, tag lists and search results for the given users"""
+        clear_request_cache()
+        cache.delete_many(*[f'{prefix}:{user_id}' for user_id in user_ids
+                            for prefix in ('lead_stats', 'lead_stats_api', 'lead_tags', 'lead_search_version')])
+    
+    @staticmethod
+    def _compute_statistics(user_id):
+        """Run the aggregate query behind get_statistics"""
         stats = {
-            'total_leads': Lead.query.filter_by(user_id=user_id).count(),
+            'total_leads': 0,
             'by_platform': {},
             'avg_followers': 0,
             'avg_engagement': 0,
             'total_followers': 0,
             'top_platforms': [],
-            'recent_leads': []
         }
         
-        # Platform distribution
+        # One grouped round-trip; overall figures are rolled up from the per-platform sums
+        # (portable across SQLite and Postgres, unlike GROUPING SETS)
         platform_stats = db.session.query(
             Lead.platform,
-            db.func.count(Lead.id).label('count'),
-            db.func.avg(Lead.followers).label('avg_followers'),
-            db.func.avg(Lead.engagement_score).label('avg_engagement')
+            db.func.count(Lead.id),
+            db.func.sum(Lead.followers),
+            db.func.count(Lead.followers),
+            db.func.sum(Lead.engagement_score),
+            db.func.count(Lead.engagement_score)
         ).filter_by(user_id=user_id).group_by(Lead.platform).all()
         
-        for platform, count, avg_f, avg_e in platform_stats:
+        followers_sum = followers_count = engagement_sum = engagement_count = 0
+        for platform, count, f_sum, f_count, e_sum, e_count in platform_stats:
+            f_sum, e_sum = f_sum or 0, e_sum or 0
             stats['by_platform'][platform] = {
                 'count': count,
-                'avg_followers': round(avg_f or 0, 2),
-                'avg_engagement': round(avg_e or 0, 2)
+                'avg_followers': round(f_sum / f_count, 2) if f_count else 0,
+                'avg_engagement': round(e_sum / e_count, 2) if e_count else 0
             }
+            stats['total_leads'] += count
+            followers_sum += f_sum
+            followers_count += f_count
+            engagement_sum += e_sum
+            engagement_count += e_count
         
         # Overall averages
-        averages = db.session.query(
-            db.func.avg(Lead.followers).label('avg_followers'),
-            db.func.avg(Lead.engagement_score).label('avg_engagement'),
-            db.func.sum(Lead.followers).label('total_followers')
-        ).filter_by(user_id=user_id).first()
-        
-        if averages:
-            stats['avg_followers'] = round(averages.avg_followers or 0, 2)
-            stats['avg_engagement'] = round(averages.avg_engagement or 0, 2)
-            stats['total_followers'] = averages.total_followers or 0
+        if followers_count:
+            stats['avg_followers'] = round(followers_sum / followers_count, 2)
+        if engagement_count:
+            stats['avg_engagement'] = round(engagement_sum / engagement_count, 2)
+        stats['total_followers'] = followers_sum
         
         # Top platforms by count
         stats['top_platforms'] = sorted(
@@ -227,26 +708,50 @@ class Lead(db.Model):
             reverse=True
         )[:5]
         
-        # Recent leads
-        stats['recent_leads'] = Lead.query.filter_by(user_id=user_id).order_by(Lead.created_at.desc()).limit(5).all()
-        
         return stats
     
     @staticmethod
+    @request_cached
     def get_top_performers(user_id, limit=10):
         """Get top performing leads by engagement score"""
-        return Lead.query.filter_by(user_id=user_id).order_by(Lead.engagement_score.desc()).limit(limit).all()
+        q = Lead.query.filter_by(user_id=user_id).order_by(Lead.engagement_score.desc())
+        # The analytics table shows only names and scores
+        return Lead._defer_columns(q, Lead.bio, Lead.tech_stack, Lead.tags).limit(limit).all()
     
     @staticmethod
+    @request_cached
     def get_all_tags(user_id):
         """Get all unique tags across all leads"""
-        all_tags = set()
-        leads = Lead.query.filter_by(user_id=user_id).all()
+        cache_key = f'lead_tags:{user_id}'
+        tags = cache.get(cache_key)
+        if tags is not None:
+            return tags
         
-        for lead in leads:
-            all_tags.update(lead.tags_list)
-        
-        return sorted(list(all_tags))
+        tags = [tag for (tag,) in db.session.query(LeadTag.tag)
+                .join(Lead, Lead.id == LeadTag.lead_id)
+                .filter(Lead.user_id == user_id)
+                .distinct()
+                .order_by(LeadTag.tag)]
+        cache.set(cache_key, tags, timeout=current_app.config['STATS_CACHE_TIMEOUT'])
+        return tags
+
+
+class LeadTag(db.Model):
+    """One row per tag on a lead, so tag filters and listings can use an index"""
+
+    __tablename__ = 'lead_tags'
+
+    MAX_LENGTH = 255
+
+    lead_id = db.Column(db.Integer, db.ForeignKey('leads.id', ondelete='CASCADE'), primary_key=True)
+    tag = db.Column(db.String(MAX_LENGTH), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_lead_tags_tag', 'tag', 'lead_id'),
+    )
+
+    def __repr__(self):
+        return f'<LeadTag {self.tag} on Lead {self.lead_id}>'
 
 
 class LeadNote(db.Model):
@@ -255,7 +760,7 @@ class LeadNote(db.Model):
     __tablename__ = 'lead_notes'
 
     id = db.Column(db.Integer, primary_key=True)
-    lead_id = db.Column(db.Integer, db.ForeignKey('leads.id'), nullable=False)
+    lead_id = db.Column(db.Integer, db.ForeignKey('leads.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     note_type = db.Column(db.String(50), default='general') # e.g., 'general', 'call', 'meeting', 'email'
@@ -263,6 +768,11 @@ class LeadNote(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves view_lead's notes-by-newest listing without a sort step
+        db.Index('ix_note_lead_created', lead_id, created_at.desc()),
+    )
+
     # Relationships
     lead = db.relationship('Lead', backref=db.backref('notes', lazy=True, cascade="all, delete-orphan"))
     author = db.relationship('User', backref=db.backref('lead_notes', lazy=True))
@@ -289,14 +799,14 @@ class EmailLog(db.Model):
     __tablename__ = 'email_logs'
 
     id = db.Column(db.Integer, primary_key=True)
-    lead_id = db.Column(db.Integer, db.ForeignKey('leads.id'), nullable=False)
+    lead_id = db.Column(db.Integer, db.ForeignKey('leads.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     subject = db.Column(db.String(255), nullable=False)
     body = db.Column(db.Text, nullable=False)
     status = db.Column(db.String(50), nullable=False) # e.g., 'sent', 'failed'
     sent_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    lead = db.relationship('Lead', backref=db.backref('email_logs', lazy=True))
+    lead = db.relationship('Lead', backref=db.backref('email_logs', lazy=True, cascade="all, delete-orphan"))
     sender = db.relationship('User', backref=db.backref('sent_emails', lazy=True))
 
     def __repr__(self):
@@ -309,12 +819,17 @@ class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
 
     id = db.Column(db.Integer, primary_key=True)
-    lead_id = db.Column(db.Integer, db.ForeignKey('leads.id'), nullable=False)
+    lead_id = db.Column(db.Integer, db.ForeignKey('leads.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'user' or 'model'
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # ai_chat reads a lead/user conversation in created_at order; scanned backwards for the recent window
+        db.Index('ix_chat_lead_user_created', lead_id, user_id, created_at, id),
+    )
+
     lead = db.relationship('Lead', backref=db.backref('chat_messages', lazy=True, cascade="all, delete-orphan"))
     author = db.relationship('User', backref=db.backref('chat_messages', lazy=True))
 
@@ -332,9 +847,6 @@ class ChatMessage(db.Model):
         }
 
 
-import uuid
-import secrets
-
 class APIKey(db.Model):
     """Model for storing API keys"""
 
@@ -342,7 +854,9 @@ class APIKey(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    key = db.Column(db.String(255), unique=True, nullable=False, default=lambda: secrets.token_urlsafe(32))
+    key = db.Column(db.String(255), unique=True, nullable=True) # Legacy plaintext keys; 'flask hash-api-keys' clears them
+    key_hash = db.Column(db.String(64), unique=True, index=True) # SHA-256 hex digest; the key itself is never stored
+    key_prefix = db.Column(db.String(8)) # Leading characters, so users can tell their keys apart
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=True)
     is_active = db.Column(db.Boolean, default=True)
@@ -352,11 +866,65 @@ class APIKey(db.Model):
     def __repr__(self):
         return f'<APIKey {self.id} for User {self.user_id}>'
 
+    @staticmethod
+    def hash_key(raw_key):
+        """Digest stored and looked up in place of the key"""
+        return hashlib.sha256(raw_key.encode()).hexdigest()
+
+    @staticmethod
+    def lookup_key(key_hash):
+        return f'api_key:{key_hash}'
+
+    @staticmethod
+    def lookup_cached(raw_key):
+        """
+        Resolve an active API key, reusing recent lookups for API_KEY_CACHE_TIMEOUT seconds
+        Returns: (user_id, expires_at), or None for unknown or revoked keys (never cached)
+        """
+        key_hash = APIKey.hash_key(raw_key)
+        cache_key = APIKey.lookup_key(key_hash)
+        entry = cache.get(cache_key)
+        if entry is None:
+            row = db.session.query(APIKey.user_id, APIKey.expires_at).filter_by(
+                key_hash=key_hash, is_active=True).first() or APIKey.rehash_legacy(raw_key, key_hash)
+            if row is None:
+                return None
+            entry = (row.user_id, row.expires_at)
+            cache.set(cache_key, entry, timeout=API_KEY_CACHE_TIMEOUT)
+        return entry
+    
+    @staticmethod
+    def rehash_legacy(raw_key, key_hash):
+        """
+        Hash a legacy plaintext key on its first use, so keys issued before hashing keep
+        working whether or not 'flask hash-api-keys' has been run
+        Returns: the updated api key, or None if no active plaintext key matches
+        """
+        api_key = APIKey.query.filter_by(key=raw_key, is_active=True).first()
+        if api_key is None:
+            return None
+        api_key.key_hash = key_hash
+        api_key.key_prefix = raw_key[:8]
+        api_key.key = None
+        db.session.commit()
+        return api_key
+
+    @staticmethod
+    def generate(user_id, expires_at=None):
+        """
+        Create an unsaved API key
+        Returns: (api_key, raw_key) - raw_key is only available now, so show it to the user once
+        """
+        raw_key = secrets.token_urlsafe(32)
+        api_key = APIKey(user_id=user_id, key_hash=APIKey.hash_key(raw_key),
+                         key_prefix=raw_key[:8], expires_at=expires_at)
+        return api_key, raw_key
+
     def to_dict(self):
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'key': self.key,
+            'key_prefix': self.key_prefix,
             'created_at': self.created_at.isoformat(),
             'expires_at': self.expires_at.isoformat() if self.expires_at else None,
             'is_active': self.is_active
@@ -368,6 +936,127 @@ class LeadManager:
     @staticmethod
     def create_lead(data):
         """Create a new lead"""
+        lead = LeadManager.build_lead(data)
+        db.session.add(lead)
+        db.session.commit()
+        
+        return lead
+    
+    @staticmethod
+    def exists(username, platform, user_id=None):
+        """Check for a lead with this username/platform without loading it"""
+        q = db.session.query(Lead.id).filter_by(username=username, platform=platform)
+        if user_id is not None:
+            q = q.filter_by(user_id=user_id)
+        return db.session.query(q.exists()).scalar()
+    
+    @staticmethod
+    def exists_key(username, platform):
+        return f'lead_exists:{platform}:{username}'
+    
+    @staticmethod
+    def exists_cached(username, platform):
+        """LeadManager.exists across all users, reusing recent answers for form validation"""
+        return cached_exists(LeadManager.exists_key(username, platform),
+                             db.session.query(Lead.id).filter_by(username=username, platform=platform))
+    
+    @staticmethod
+    def create_lead_if_absent(data):
+        """
+        Insert a lead unless the user already has one with the same username and platform
+        Returns: the new lead's id, or None if it already existed
+        """
+        lead = LeadManager.build_lead(data)
+        values = LeadManager._column_values(lead)
+        
+        insert = LeadManager._conflict_insert()
+        if insert is None:
+            # No ON CONFLICT support; rely on the unique constraint instead
+            try:
+                db.session.add(lead)
+                db.session.commit()
+                return lead.id
+            except IntegrityError:
+                db.session.rollback()
+                return None
+        
+        # A single atomic statement: no separate existence check, no duplicate race
+        stmt = insert(Lead).values(**values).on_conflict_do_nothing(
+            index_elements=['user_id', 'username', 'platform']
+        ).returning(Lead.id)
+        lead_id = db.session.execute(stmt).scalar()
+        if lead_id is not None and lead.tag_rows:
+            db.session.execute(LeadTag.__table__.insert(),
+                               [{'lead_id': lead_id, 'tag': row.tag} for row in lead.tag_rows])
+        db.session.commit()
+        
+        # Core inserts skip the ORM flush hooks
+        if lead_id is not None:
+            Lead.invalidate_cache(lead.user_id)
+        return lead_id
+    
+    @staticmethod
+    def upsert_lead(data, update_fields):
+        """
+        Insert a lead, or update update_fields on the user's existing lead with the same
+        username and platform
+        Returns: (lead_id, created)
+        """
+        lead = LeadManager.build_lead(data)
+        lead.created_at = lead.last_updated = datetime.utcnow()
+        
+        insert = LeadManager._conflict_insert()
+        if insert is None:
+            existing = db.session.query(Lead.id).filter_by(
+                user_id=lead.user_id, username=lead.username, platform=lead.platform
+            ).first()
+            if existing:
+                LeadManager.update_lead(existing.id, {field: data.get(field) for field in update_fields})
+                return existing.id, False
+            db.session.add(lead)
+            db.session.commit()
+            return lead.id, True
+        
+        # One atomic statement instead of SELECT then UPDATE/INSERT
+        stmt = insert(Lead).values(**LeadManager._column_values(lead))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'username', 'platform'],
+            set_={field: stmt.excluded[field] for field in (*update_fields, 'last_updated')}
+        ).returning(Lead.id, Lead.created_at)
+        row = db.session.execute(stmt).one()
+        
+        # An update keeps the existing row's created_at
+        created = row.created_at == lead.created_at
+        if created and lead.tag_rows:
+            db.session.execute(LeadTag.__table__.insert(),
+                               [{'lead_id': row.id, 'tag': tag_row.tag} for tag_row in lead.tag_rows])
+        db.session.commit()
+        
+        # Core statements skip the ORM flush hooks
+        Lead.invalidate_cache(lead.user_id)
+        return row.id, created
+    
+    @staticmethod
+    def _column_values(lead):
+        """Column values set on an unsaved lead, for Core INSERT statements"""
+        return {column.key: getattr(lead, column.key) for column in Lead.__table__.columns
+                if getattr(lead, column.key) is not None}
+    
+    @staticmethod
+    def _conflict_insert():
+        """The dialect's insert() supporting ON CONFLICT, or None if it has none"""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            return None
+        return insert
+    
+    @staticmethod
+    def build_lead(data):
+        """Build an unsaved Lead from a dictionary of lead fields"""
         lead = Lead(
             user_id=data.get('user_id'),
             username=data.get('username'),
@@ -384,6 +1073,7 @@ class LeadManager:
             company_size=data.get('company_size'),
             job_title=data.get('job_title'),
             tech_stack=data.get('tech_stack'),
+            visitor_ip=data.get('visitor_ip'),
             engagement_score=data.get('engagement_score', 0)
         )
         
@@ -393,17 +1083,68 @@ class LeadManager:
 
         # Handle tech_stack
         if 'tech_stack' in data and isinstance(data['tech_stack'], list):
-            lead.tech_stack = json.dumps(data['tech_stack'])
+            lead.tech_stack = dump_json_list(data['tech_stack'])
         
-        db.session.add(lead)
+        return lead
+    
+    @staticmethod
+    def lead_values(data):
+        """Column values for a new lead, as build_lead would set them, without building a Lead"""
+        now = datetime.utcnow()
+        tech_stack = data.get('tech_stack')
+        return {
+            'user_id': data.get('user_id'),
+            'username': data.get('username'),
+            'platform': data.get('platform'),
+            'full_name': data.get('full_name'),
+            'bio': data.get('bio'),
+            'followers': data.get('followers', 0),
+            'email': data.get('email'),
+            'website': data.get('website'),
+            'location': data.get('location'),
+            'profile_url': data.get('profile_url'),
+            'company_name': data.get('company_name'),
+            'company_industry': data.get('company_industry'),
+            'company_size': data.get('company_size'),
+            'job_title': data.get('job_title'),
+            'tech_stack': dump_json_list(tech_stack) if isinstance(tech_stack, list) else tech_stack,
+            'visitor_ip': data.get('visitor_ip'),
+            'engagement_score': data.get('engagement_score', 0),
+            'tags': dump_json_list(Lead.parse_tags(data.get('tags'))),
+            'created_at': now,
+            'last_updated': now,
+        }
+    
+    @staticmethod
+    def create_leads_bulk(rows):
+        """
+        Insert many leads from lead_values() dictionaries in one transaction, using
+        executemany INSERTs instead of building and flushing a Lead per row
+        Returns: number of leads inserted
+        """
+        if not rows:
+            return 0
+        
+        insert_leads = db.insert(Lead).returning(Lead.id, sort_by_parameter_order=True)
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            chunk = rows[i:i + INSERT_BATCH_SIZE]
+            lead_ids = db.session.scalars(insert_leads, chunk).all()
+            tag_rows = [{'lead_id': lead_id, 'tag': tag}
+                        for lead_id, row in zip(lead_ids, chunk)
+                        for tag in Lead.tag_row_values(json_list(row['tags']))]
+            if tag_rows:
+                db.session.execute(LeadTag.__table__.insert(), tag_rows)
         db.session.commit()
         
-        return lead
+        # Bulk inserts skip the ORM flush hooks, so invalidate caches explicitly
+        Lead.invalidate_cache(*{row['user_id'] for row in rows})
+        cache.delete_many(*{LeadManager.exists_key(row['username'], row['platform']) for row in rows})
+        return len(rows)
     
     @staticmethod
     def update_lead(lead_id, data):
         """Update an existing lead"""
-        lead = Lead.query.get(lead_id)
+        lead = db.session.get(Lead, lead_id)
         if not lead:
             return None
         
@@ -412,7 +1153,7 @@ class LeadManager:
             if key == 'tags':
                 lead.tags_list = value
             elif key == 'tech_stack' and isinstance(value, list):
-                lead.tech_stack = json.dumps(value)
+                lead.tech_stack = dump_json_list(value)
             elif hasattr(lead, key) and key not in ['id', 'created_at']:
                 setattr(lead, key, value)
         
@@ -424,7 +1165,7 @@ class LeadManager:
     @staticmethod
     def delete_lead(lead_id):
         """Delete a lead"""
-        lead = Lead.query.get(lead_id)
+        lead = db.session.get(Lead, lead_id)
         if not lead:
             return False
         
@@ -434,69 +1175,247 @@ class LeadManager:
         return True
     
     @staticmethod
-    def bulk_delete(lead_ids):
-        """Delete multiple leads"""
-        count = Lead.query.filter(Lead.id.in_(lead_ids)).delete(synchronize_session=False)
+    def bulk_delete(lead_ids, user_id):
+        """Delete multiple leads, skipping any not owned by user_id"""
+        lead_ids = list(lead_ids)
+        count = 0
+        exists_keys = set()
+        leads_table = Lead.__table__
+        
+        # One Core DELETE per table for each chunk of ids, all in a single transaction
+        for i in range(0, len(lead_ids), DELETE_BATCH_SIZE):
+            rows = db.session.query(Lead.id, Lead.username, Lead.platform).filter(
+                Lead.id.in_(lead_ids[i:i + DELETE_BATCH_SIZE]), Lead.user_id == user_id).all()
+            if not rows:
+                continue
+            ids = [row.id for row in rows]
+            exists_keys.update(LeadManager.exists_key(row.username, row.platform) for row in rows)
+            
+            # Every statement repeats the owner filter, so rows are never deleted by id alone
+            owned_ids = db.select(leads_table.c.id).where(
+                leads_table.c.id.in_(ids), leads_table.c.user_id == user_id)
+            
+            # Core deletes skip ORM cascades (and SQLite does not enforce
+            # ON DELETE CASCADE by default), so clear child rows explicitly
+            for child in (LeadTag, LeadNote, ChatMessage, EmailLog):
+                child_table = child.__table__
+                db.session.execute(child_table.delete().where(child_table.c.lead_id.in_(owned_ids)))
+            count += db.session.execute(leads_table.delete().where(
+                leads_table.c.id.in_(ids), leads_table.c.user_id == user_id)).rowcount
+        
+        if not count:
+            return 0
         db.session.commit()
+        
+        # Core statements bypass the ORM flush hooks, so invalidate caches explicitly
+        Lead.invalidate_cache(user_id)
+        cache.delete_many(*exists_keys)
         return count
     
     @staticmethod
-    def bulk_update_tags(lead_ids, tags, action='add'):
+    def bulk_update_tags(lead_ids, tags, action='add', user_id=None):
         """
-        Bulk update tags for multiple leads
+        Bulk update tags for multiple leads (only those owned by user_id, when given)
         action: 'add', 'remove', or 'replace'
         """
-        leads = Lead.query.filter(Lead.id.in_(lead_ids)).all()
+        lead_ids = list(lead_ids)
+        tags = list(dict.fromkeys(str(tag)[:LeadTag.MAX_LENGTH] for tag in tags))
+        now = datetime.utcnow()
+        count = 0
+        owners = set()
+        
+        leads_table = Lead.__table__
+        tags_table = LeadTag.__table__
+        update_tags = leads_table.update().where(leads_table.c.id == bindparam('lead_id'))
         
-        for lead in leads:
-            current_tags = lead.tags_list
+        # Per chunk of ids: one SELECT, one executemany UPDATE and a rewrite of the
+        # chunk's lead_tags rows, instead of loading and flushing every Lead
+        for i in range(0, len(lead_ids), DELETE_BATCH_SIZE):
+            q = db.session.query(Lead.id, Lead.user_id, Lead.tags).filter(Lead.id.in_(lead_ids[i:i + DELETE_BATCH_SIZE]))
+            if user_id is not None:
+                q = q.filter(Lead.user_id == user_id)
+            rows = q.all()
+            if not rows:
+                continue
+            owners.update(row.user_id for row in rows)
             
-            if action == 'add':
-                new_tags = list(set(current_tags + tags))
-            elif action == 'remove':
-                new_tags = [tag for tag in current_tags if tag not in tags]
-            else:  # replace
-                new_tags = tags
+            new_tags = {}
+            for row in rows:
+                current_tags = json_list(row.tags)
+                if action == 'add':
+                    new_tags[row.id] = list(dict.fromkeys(current_tags + tags))
+                elif action == 'remove':
+                    new_tags[row.id] = [tag for tag in current_tags if tag not in tags]
+                else:  # replace
+                    new_tags[row.id] = tags
             
-            lead.tags_list = new_tags
-            lead.last_updated = datetime.utcnow()
+            db.session.execute(update_tags, [
+                {'lead_id': lead_id, 'tags': dump_json_list(value), 'last_updated': now}
+                for lead_id, value in new_tags.items()
+            ])
+            db.session.execute(tags_table.delete().where(tags_table.c.lead_id.in_(list(new_tags))))
+            tag_rows = [{'lead_id': lead_id, 'tag': tag}
+                        for lead_id, value in new_tags.items()
+                        for tag in Lead.tag_row_values(value)]
+            if tag_rows:
+                db.session.execute(tags_table.insert(), tag_rows)
+            count += len(rows)
         
+        if not count:
+            return 0
         db.session.commit()
-        return len(leads)
+        
+        # Core statements bypass the ORM flush hooks, so invalidate caches explicitly
+        Lead.invalidate_cache(*owners)
+        return count
     
     @staticmethod
-    def import_leads(leads_data, user_id):
+    def import_leads_iter(leads_iter, user_id, batch_size=500):
         """
-        Bulk import leads from list of dictionaries
+        Import leads from any iterable of dictionaries, batch_size rows at a time
         Returns: (success_count, error_count, errors_list)
         """
         success_count = 0
         error_count = 0
         errors = []
-
+        
+        batch = []
+        row_offset = 0
+        for data in leads_iter:
+            batch.append(data)
+            if len(batch) >= batch_size:
+                added, failed, batch_errors = LeadManager.import_leads(batch, user_id, row_offset)
+                success_count += added
+                error_count += failed
+                errors.extend(batch_errors)
+                row_offset += len(batch)
+                batch = []
+        
+        if batch:
+            added, failed, batch_errors = LeadManager.import_leads(batch, user_id, row_offset)
+            success_count += added
+            error_count += failed
+            errors.extend(batch_errors)
+        
+        return success_count, error_count, errors
+    
+    @staticmethod
+    def import_leads(leads_data, user_id, row_offset=0):
+        """
+        Bulk import leads from list of dictionaries
+        row_offset: number of rows before this batch, used in error messages
+        Returns: (success_count, error_count, errors_list)
+        """
+        error_count = 0
+        errors = []
+        
+        # Look up every (username, platform) pair that already exists in a few
+        # batched queries rather than one SELECT per row
+        usernames = list({data.get('username') for data in leads_data})
+        existing = set()
+        for i in range(0, len(usernames), IMPORT_LOOKUP_BATCH_SIZE):
+            existing.update(
+                db.session.query(Lead.username, Lead.platform).filter(
+                    Lead.user_id == user_id,
+                    Lead.username.in_(usernames[i:i + IMPORT_LOOKUP_BATCH_SIZE])
+                )
+            )
+        
+        new_leads = []
         for idx, data in enumerate(leads_data):
+            key = (data.get('username'), data.get('platform'))
+            if key in existing:
+                errors.append(f"Row {row_offset + idx + 1}: Lead already exists for this user - {data.get('username')}")
+                error_count += 1
+                continue
+            
             try:
                 # Associate lead with the current user
                 data['user_id'] = user_id
-
-                # Check if lead already exists for this user
-                existing = Lead.query.filter_by(
-                    user_id=user_id,
-                    username=data.get('username'),
-                    platform=data.get('platform')
-                ).first()
-
-                if existing:
-                    errors.append(f"Row {idx + 1}: Lead already exists for this user - {data.get('username')}")
-                    error_count += 1
-                    continue
-
+                new_leads.append((idx, data, LeadManager.lead_values(data)))
+                existing.add(key)  # Also catches duplicates within the file itself
+            except Exception as e:
+                errors.append(f"Row {row_offset + idx + 1}: {str(e)}")
+                error_count += 1
+        
+        # Insert everything in one transaction with executemany INSERTs
+        try:
+            LeadManager.create_leads_bulk([values for _, _, values in new_leads])
+            return len(new_leads), error_count, errors
+        except Exception:
+            db.session.rollback()
+        
+        # Some row was rejected by the database; retry one by one to report it
+        success_count = 0
+        for idx, data, _ in new_leads:
+            try:
                 LeadManager.create_lead(data)
                 success_count += 1
-
             except Exception as e:
                 db.session.rollback()
-                errors.append(f"Row {idx + 1}: {str(e)}")
+                errors.append(f"Row {row_offset + idx + 1}: {str(e)}")
                 error_count += 1
         
-        return success_count, error_count, errors
\ No newline at end of file
+        return success_count, error_count, errors
+
+
+# ============================================================================
+# Cache Invalidation
+# ============================================================================
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    """No-op; registered with active_history so a rename still knows the old existence key"""
+
+
+for _attribute in (Lead.username, Lead.platform, User.username, User.email):
+    event.listen(_attribute, 'set', _keep_previous_value, active_history=True)
+
+
+def _values_before_flush(obj, attr):
+    """Current value of attr plus any value the flush just replaced"""
+    return {getattr(obj, attr), *inspect(obj).attrs[attr].history.deleted}
+
+
+def _stale_cache_keys(obj):
+    """Existence-check and API key cache keys a changed Lead, User or APIKey may have made stale"""
+    if isinstance(obj, Lead):
+        return [LeadManager.exists_key(username, platform)
+                for username in _values_before_flush(obj, 'username')
+                for platform in _values_before_flush(obj, 'platform')]
+    if isinstance(obj, User):
+        return ([User.username_exists_key(username) for username in _values_before_flush(obj, 'username')] +
+                [User.email_exists_key(email) for email in _values_before_flush(obj, 'email')])
+    if isinstance(obj, APIKey) and obj.key_hash:
+        return [APIKey.lookup_key(obj.key_hash)]
+    return []
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_stale_lead_caches(session, flush_context):
+    """Remember which cached lead aggregates and existence checks the current transaction changed"""
+    stale = session.info.setdefault('stale_lead_caches', set())
+    stale_keys = session.info.setdefault('stale_exists_keys', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Lead) and obj.user_id is not None:
+            stale.add(obj.user_id)
+            clear_request_cache()
+        stale_keys.update(_stale_cache_keys(obj))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_lead_caches(session):
+    """Drop cached lead aggregates and existence checks once the changes are committed"""
+    stale = session.info.pop('stale_lead_caches', None)
+    if stale:
+        Lead.invalidate_cache(*stale)
+    
+    stale_keys = session.info.pop('stale_exists_keys', None)
+    if stale_keys:
+        cache.delete_many(*stale_keys)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_lead_caches(session):
+    """Forget pending invalidations for rolled back changes"""
+    session.info.pop('stale_lead_caches', None)
+    session.info.pop('stale_exists_keys', None)
@@ -1,8 +1,34 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import lxml.html
+from lxml import etree
+import logging
 import re
 from urllib.parse import urlparse
 
+logger = logging.getLogger(__name__)
+
+# Shared session so repeat scrapes reuse pooled keep-alive connections
+_http = requests.Session()
+_http.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+_http.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+# The lookbehind only lets a match start at the beginning of a run of local-part characters;
+# without it every position inside a long word is retried, making the scan quadratic
+_EMAIL_RE = re.compile(r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_PHONE_RE = re.compile(r'\b(?:\d{3}[-.]?\d{3}[-.]?\d{4}|\(\d{3}\)\s*\d{3}[-.]?\d{4})\b')
+
+# Emails and phone numbers in one alternation, so a page is scanned once for both
+_CONTACT_RE = re.compile(f'(?P<email>{_EMAIL_RE.pattern})|(?P<phone>{_PHONE_RE.pattern})')
+
+_SOCIAL_DOMAINS = ('twitter.com', 'instagram.com', 'linkedin.com', 'facebook.com', 'tiktok.com', 'youtube.com')
+_SOCIAL_DOMAIN_RE = re.compile('|'.join(re.escape(domain) for domain in _SOCIAL_DOMAINS))
+
+# Anchors pointing at a social domain, filtered inside lxml rather than link by link in Python
+_SOCIAL_LINKS_XPATH = etree.XPath(
+    '//a[' + ' or '.join(f"contains(@href, '{domain}')" for domain in _SOCIAL_DOMAINS) + ']'
+)
+
 def _extract_social_media_info(url):
     """Attempts to extract social media platform and username from a URL."""
     parsed_url = urlparse(url)
@@ -49,57 +75,108 @@ def _extract_social_media_info(url):
 
     return platform, username
 
-def _extract_company_info(soup):
+def _parse_page(content):
+    """
+    Parse a page with lxml and collect what the extractors need in one walk over the tree
+    Returns: dict with title, meta (name/property -> content), social_links ((href, text) pairs),
+    script_srcs, link_hrefs and the visible text
+    """
+    root = lxml.html.fromstring(content)
+    page = {'title': None, 'meta': {}, 'script_srcs': [], 'link_hrefs': []}
+    
+    page['social_links'] = [(el.get('href'), ''.join(part.strip() for part in el.itertext()))
+                            for el in _SOCIAL_LINKS_XPATH(root)]
+    
+    for el in root.iter('title', 'meta', 'script', 'link'):
+        tag = el.tag
+        if tag == 'script':
+            if el.get('src') is not None:
+                page['script_srcs'].append(el.get('src'))
+        elif tag == 'link':
+            if el.get('href') is not None:
+                page['link_hrefs'].append(el.get('href'))
+        elif tag == 'meta':
+            key = el.get('name') or el.get('property')
+            if key:
+                page['meta'].setdefault(key, el.get('content'))
+        elif page['title'] is None:
+            page['title'] = el.text
+    
+    # Text nodes outside script/style, like BeautifulSoup's get_text()
+    page['text'] = ''.join(root.xpath('//text()[not(ancestor::script) and not(ancestor::style)]'))
+    return page
+
+def _extract_company_info(page):
     """Attempts to extract company name and industry from a webpage."""
     company_name = None
     company_industry = None
 
     # Try to get company name from title or meta tags
-    if soup.title and soup.title.string:
-        company_name = soup.title.string.split('|').strip()
+    if page['title']:
+        company_name = page['title'].split('|')[0].strip()
     
-    meta_description = soup.find('meta', attrs={'name': 'description'})
-    if meta_description and meta_description.get('content'):
+    meta_description = page['meta'].get('description')
+    if meta_description:
         # Simple heuristic: look for keywords in description
-        description = meta_description['content'].lower()
+        description = meta_description.lower()
         if 'software' in description or 'tech' in description:
             company_industry = 'Technology'
         elif 'finance' in description or 'bank' in description:
             company_industry = 'Finance'
         # Add more industry heuristics as needed
 
-    og_site_name = soup.find('meta', attrs={'property': 'og:site_name'})
-    if og_site_name and og_site_name.get('content'):
-        company_name = og_site_name['content'].strip()
+    og_site_name = page['meta'].get('og:site_name')
+    if og_site_name:
+        company_name = og_site_name.strip()
 
     return company_name, company_industry
 
-def _extract_tech_stack(soup):
+# Technology fingerprints, each searched for in a single pass; group names map to labels
+_TEXT_FINGERPRINT_RE = re.compile(
+    r'(?P<wordpress>wp-content|wordpress)'
+    r'|(?P<shopify>shopify\.com)'
+    r'|(?P<google_analytics>google-analytics\.com/analytics\.js|gtag\.js)'
+    r'|(?P<facebook_pixel>facebook\.com/tr)'
+)
+_SCRIPT_FINGERPRINT_RE = re.compile(
+    r'(?P<react>react(?:\.production)?\.min\.js)'
+    r'|(?P<vue>vue(?:\.min)?\.js)'
+    r'|(?P<angular>angular(?:\.min)?\.js)'
+)
+_SHOPIFY_CDN_RE = re.compile(r'cdn\.shopify\.com')
+_JOOMLA_RE = re.compile(r'Joomla', re.IGNORECASE)
+_FINGERPRINT_TECH = {
+    'wordpress': 'WordPress',
+    'shopify': 'Shopify',
+    'google_analytics': 'Google Analytics',
+    'facebook_pixel': 'Facebook Pixel',
+    'react': 'React',
+    'vue': 'Vue.js',
+    'angular': 'Angular',
+}
+
+def _extract_tech_stack(page):
     """Attempts to identify technologies used on a webpage."""
-    tech_stack = []
-    text = soup.get_text().lower()
-
-    # Look for common CMS/framework footprints
-    if re.search(r'wp-content|wordpress', text):
-        tech_stack.append('WordPress')
-    if re.search(r'shopify\.com', text) or soup.find('link', href=re.compile(r'cdn\.shopify\.com')):
-        tech_stack.append('Shopify')
-    if soup.find('script', src=re.compile(r'react(\.production)?\.min\.js')):
-        tech_stack.append('React')
-    if soup.find('script', src=re.compile(r'vue(\.min)?\.js')):
-        tech_stack.append('Vue.js')
-    if soup.find('script', src=re.compile(r'angular(\.min)?\.js')):
-        tech_stack.append('Angular')
-    if soup.find('meta', attrs={'name': 'generator', 'content': re.compile(r'Joomla', re.IGNORECASE)}):
+    found = set()
+    
+    # Look for CMS and analytics/marketing footprints in the page text
+    text = page['text'].lower()
+    found.update(match.lastgroup for match in _TEXT_FINGERPRINT_RE.finditer(text))
+    
+    # Look for framework bundles among the page's script sources
+    for src in page['script_srcs']:
+        match = _SCRIPT_FINGERPRINT_RE.search(src)
+        if match:
+            found.add(match.lastgroup)
+    
+    if 'shopify' not in found and any(_SHOPIFY_CDN_RE.search(href) for href in page['link_hrefs']):
+        found.add('shopify')
+    
+    tech_stack = sorted(_FINGERPRINT_TECH[key] for key in found)
+    if _JOOMLA_RE.search(page['meta'].get('generator') or ''):
         tech_stack.append('Joomla')
     
-    # Look for analytics/marketing tools
-    if re.search(r'google-analytics\.com/analytics\.js', text) or re.search(r'gtag\.js', text):
-        tech_stack.append('Google Analytics')
-    if re.search(r'facebook\.com/tr', text):
-        tech_stack.append('Facebook Pixel')
-
-    return list(set(tech_stack)) # Return unique technologies
+    return tech_stack
 
 def scrape_leads(url):
     """
@@ -112,67 +189,58 @@ def scrape_leads(url):
         url = 'https://' + url
 
     try:
-        response = requests.get(url, timeout=10)
+        response = _http.get(url, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
+        page = _parse_page(response.content)
 
         # Use a dict to avoid duplicate leads based on a primary identifier (e.g., email or username)
         potential_leads_data = {}
 
-        # 1. Extract Email Addresses from text and mailto links
-        email_regex = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        found_emails = set(re.findall(email_regex, response.text))
+        # 1-2. Extract email addresses and phone numbers from the text in a single scan
+        # (dicts keep first-seen order while dropping repeats)
+        found_emails = {}
+        found_phones = {}
+        for match in _CONTACT_RE.finditer(response.text):
+            if match.lastgroup == 'email':
+                found_emails[match.group('email')] = None
+            else:
+                found_phones[match.group('phone')] = None
         
         for email in found_emails:
-            if email not in potential_leads_data:
-                potential_leads_data[email] = {'email': email, 'platform': 'email', 'profile_url': f'mailto:{email}'}
+            potential_leads_data[email] = {'email': email, 'platform': 'email', 'profile_url': f'mailto:{email}'}
 
-        # 2. Extract Phone Numbers from text
-        phone_regex = r'\b(?:\d{3}[-.]?\d{3}[-.]?\d{4}|\(\d{3}\)\s*\d{3}[-.]?\d{4})\b'
-        found_phones = set(re.findall(phone_regex, response.text))
-        
         for phone in found_phones:
-            # For simplicity, adding as new lead if not associated with an existing email lead
+            # For simplicity, each phone becomes its own lead
             # A more sophisticated approach would try to link phones to existing leads
-            if not any(lead.get('phone') == phone for lead in potential_leads_data.values()):
-                # Create a unique key for phone leads if no email/username
-                phone_key = f"phone_{phone}"
-                potential_leads_data[phone_key] = {'phone': phone, 'platform': 'phone'}
+            potential_leads_data[f"phone_{phone}"] = {'phone': phone, 'platform': 'phone'}
 
 
         # 3. Extract Social Media Profiles from links
-        all_links = soup.find_all('a', href=True)
-        social_platforms_domains = ['twitter.com', 'instagram.com', 'linkedin.com', 'facebook.com', 'tiktok.com', 'youtube.com']
-
-        for link in all_links:
-            href = link['href']
-            text = link.get_text(strip=True)
-
-            if any(domain in href for domain in social_platforms_domains):
-                platform, username = _extract_social_media_info(href)
-                if username:
-                    # Use a combination of platform and username as a unique key
-                    social_key = f"{platform}_{username}"
-                    if social_key not in potential_leads_data:
-                        lead_entry = {
-                            'username': username,
-                            'platform': platform,
-                            'profile_url': href,
-                            'full_name': text if text and len(text) < 50 else None # Heuristic for full name
-                        }
-                        potential_leads_data[social_key] = lead_entry
-                    else:
-                        # Update existing entry if more info is found (e.g., full_name)
-                        if not potential_leads_data[social_key].get('full_name') and text and len(text) < 50:
-                            potential_leads_data[social_key]['full_name'] = text
+        for href, text in page['social_links']:
+            platform, username = _extract_social_media_info(href)
+            if username:
+                # Use a combination of platform and username as a unique key
+                social_key = f"{platform}_{username}"
+                if social_key not in potential_leads_data:
+                    lead_entry = {
+                        'username': username,
+                        'platform': platform,
+                        'profile_url': href,
+                        'full_name': text if text and len(text) < 50 else None # Heuristic for full name
+                    }
+                    potential_leads_data[social_key] = lead_entry
+                else:
+                    # Update existing entry if more info is found (e.g., full_name)
+                    if not potential_leads_data[social_key].get('full_name') and text and len(text) < 50:
+                        potential_leads_data[social_key]['full_name'] = text
 
         # Convert dictionary to list of leads
         leads = list(potential_leads_data.values())
 
         # Add some default/placeholder values for other fields and refine existing ones
         # Extract company and tech stack info once per URL
-        company_name, company_industry = _extract_company_info(soup)
-        tech_stack = _extract_tech_stack(soup)
+        company_name, company_industry = _extract_company_info(page)
+        tech_stack = _extract_tech_stack(page)
 
         for lead in leads:
             lead.setdefault('full_name', None)
@@ -200,7 +268,7 @@ def scrape_leads(url):
                 lead['username'] = lead['email'].split('@') # Get prefix only
             
             # If still no platform, default to 'website' if profile_url is not social
-            if not lead.get('platform') and lead.get('profile_url') and not any(p in lead['profile_url'] for p in social_platforms_domains):
+            if not lead.get('platform') and lead.get('profile_url') and not _SOCIAL_DOMAIN_RE.search(lead['profile_url']):
                 lead['platform'] = 'website'
             elif not lead.get('platform') and lead.get('phone'): # For phone-only leads
                 lead['platform'] = 'phone'
@@ -208,8 +276,8 @@ def scrape_leads(url):
                 lead['platform'] = 'unknown'
 
     except requests.exceptions.RequestException as e:
-        print(f"Error scraping {url}: {e}")
-    except Exception as e:
-        print(f"An unexpected error occurred during scraping {url}: {e}")
+        logger.warning("Error scraping %s: %s", url, e)
+    except Exception:
+        logger.exception("An unexpected error occurred during scraping %s", url)
     
     return leads
@@ -5,6 +5,8 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize currentPage from URL or default to 1
     const urlParams = new URLSearchParams(window.location.search);
     let currentPage = parseInt(urlParams.get('page')) || 1;
+    // Keyset cursor for the row after the last one shown; falls back to page numbers
+    let nextCursor = leadsContainer ? leadsContainer.dataset.nextCursor : '';
     
     let isLoading = false;
     let hasMore = true; // Assume true until proven otherwise by an AJAX call
@@ -16,7 +18,12 @@ document.addEventListener('DOMContentLoaded', function() {
         loadingIndicator.style.display = 'block';
 
         const currentUrl = new URL(window.location.href);
-        currentUrl.searchParams.set('page', currentPage + 1);
+        if (nextCursor) {
+            currentUrl.searchParams.set('cursor', nextCursor);
+            currentUrl.searchParams.delete('page');
+        } else {
+            currentUrl.searchParams.set('page', currentPage + 1);
+        }
         currentUrl.searchParams.set('ajax', '1'); // Indicate an AJAX request
 
         fetch(currentUrl.toString())
@@ -31,6 +38,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     });
                     currentPage++;
                     hasMore = data.has_more;
+                    nextCursor = data.next_cursor || '';
                 } else {
                     hasMore = false;
                 }
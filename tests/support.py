@@ -0,0 +1,41 @@
+"""Shared fixtures for tests that run model code against an in-memory SQLite database"""
+import unittest
+
+from flask import Flask
+
+from models import LeadManager, User, cache, db
+
+
+class ModelTestCase(unittest.TestCase):
+    """Pushes an app context with a fresh in-memory database and two users"""
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        app.config['STATS_CACHE_TIMEOUT'] = 30
+        db.init_app(app)
+        cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+        ctx = app.test_request_context()
+        ctx.push()
+        self.addCleanup(ctx.pop)
+
+        db.create_all()
+        self.addCleanup(db.drop_all)
+        self.addCleanup(db.session.remove)
+        self.owner = self.create_user('owner')
+        self.other = self.create_user('other')
+
+    def create_user(self, username):
+        user = User(username=username, email=f'{username}@example.com')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+    def create_lead(self, username, user_id=None, **fields):
+        """Create a lead through the ORM path and return its id"""
+        data = dict(fields, username=username, user_id=user_id or self.owner)
+        data.setdefault('platform', 'twitter')
+        lead = LeadManager.build_lead(data)
+        db.session.add(lead)
+        db.session.commit()
+        return lead.id
@@ -0,0 +1,52 @@
+"""Tests for API key lookups"""
+import unittest
+from datetime import datetime
+
+from models import APIKey, cache, db
+from support import ModelTestCase
+
+
+class APIKeyLookupTestCase(ModelTestCase):
+    def test_generated_key_resolves_to_its_user(self):
+        api_key, raw_key = APIKey.generate(self.owner)
+        db.session.add(api_key)
+        db.session.commit()
+
+        self.assertEqual(APIKey.lookup_cached(raw_key), (self.owner, None))
+        self.assertIsNone(api_key.key)
+
+    def test_unknown_and_revoked_keys_are_rejected(self):
+        api_key, raw_key = APIKey.generate(self.owner)
+        api_key.is_active = False
+        db.session.add(api_key)
+        db.session.commit()
+
+        self.assertIsNone(APIKey.lookup_cached(raw_key))
+        self.assertIsNone(APIKey.lookup_cached('not-a-key'))
+
+    def test_legacy_plaintext_key_is_hashed_on_first_use(self):
+        expires_at = datetime(2030, 1, 1)
+        db.session.add(APIKey(user_id=self.owner, key='legacy-plaintext-key', expires_at=expires_at))
+        db.session.commit()
+
+        self.assertEqual(APIKey.lookup_cached('legacy-plaintext-key'), (self.owner, expires_at))
+
+        api_key = APIKey.query.one()
+        self.assertIsNone(api_key.key)
+        self.assertEqual(api_key.key_hash, APIKey.hash_key('legacy-plaintext-key'))
+        self.assertEqual(api_key.key_prefix, 'legacy-p')
+
+        # Later lookups go through the hash, from the database as well as the cache
+        cache.clear()
+        self.assertEqual(APIKey.lookup_cached('legacy-plaintext-key'), (self.owner, expires_at))
+
+    def test_revoked_legacy_key_is_rejected(self):
+        db.session.add(APIKey(user_id=self.owner, key='legacy-revoked-key', is_active=False))
+        db.session.commit()
+
+        self.assertIsNone(APIKey.lookup_cached('legacy-revoked-key'))
+        self.assertEqual(APIKey.query.one().key, 'legacy-revoked-key')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Tests for LeadManager.bulk_delete"""
+import unittest
+from unittest import mock
+
+from models import ChatMessage, EmailLog, Lead, LeadManager, LeadNote, LeadTag, cache, db
+from support import ModelTestCase
+
+CHILD_MODELS = (LeadTag, LeadNote, ChatMessage, EmailLog)
+
+
+class BulkDeleteTestCase(ModelTestCase):
+    def add_children(self, lead_id, user_id):
+        db.session.add_all([
+            LeadNote(lead_id=lead_id, user_id=user_id, content='note'),
+            ChatMessage(lead_id=lead_id, user_id=user_id, role='user', content='hi'),
+            EmailLog(lead_id=lead_id, user_id=user_id, subject='s', body='b', status='sent'),
+        ])
+        db.session.commit()
+
+    def child_counts(self, lead_id):
+        return [child.query.filter_by(lead_id=lead_id).count() for child in CHILD_MODELS]
+
+    def test_deletes_owned_leads_and_their_child_rows(self):
+        lead_ids = [self.create_lead(f'lead{i}', tags=['a', 'b']) for i in range(3)]
+        for lead_id in lead_ids:
+            self.add_children(lead_id, self.owner)
+
+        self.assertEqual(LeadManager.bulk_delete(lead_ids[:2], self.owner), 2)
+
+        self.assertEqual([lead.id for lead in Lead.query.all()], lead_ids[2:])
+        for lead_id in lead_ids[:2]:
+            self.assertEqual(self.child_counts(lead_id), [0, 0, 0, 0])
+        self.assertEqual(self.child_counts(lead_ids[2]), [2, 1, 1, 1])
+
+    def test_leaves_other_users_leads_and_child_rows_alone(self):
+        own_id = self.create_lead('mine')
+        foreign_id = self.create_lead('theirs', self.other, tags=['x'])
+        self.add_children(foreign_id, self.other)
+
+        self.assertEqual(LeadManager.bulk_delete([own_id, foreign_id], self.owner), 1)
+
+        self.assertIsNone(db.session.get(Lead, own_id))
+        self.assertIsNotNone(db.session.get(Lead, foreign_id))
+        self.assertEqual(self.child_counts(foreign_id), [1, 1, 1, 1])
+
+    def test_deletes_across_id_batches(self):
+        lead_ids = [self.create_lead(f'lead{i}') for i in range(5)]
+        with mock.patch('models.DELETE_BATCH_SIZE', 2):
+            self.assertEqual(LeadManager.bulk_delete(lead_ids + [999], self.owner), 5)
+        self.assertEqual(Lead.query.count(), 0)
+
+    def test_drops_cached_existence_checks(self):
+        lead_id = self.create_lead('cached')
+        self.assertTrue(LeadManager.exists_cached('cached', 'twitter'))
+
+        LeadManager.bulk_delete([lead_id], self.owner)
+
+        self.assertIsNone(cache.get(LeadManager.exists_key('cached', 'twitter')))
+        self.assertFalse(LeadManager.exists_cached('cached', 'twitter'))
+
+
+if __name__ == '__main__':
+    unittest.main()
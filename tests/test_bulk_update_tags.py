@@ -0,0 +1,57 @@
+"""Tests for LeadManager.bulk_update_tags"""
+import unittest
+from unittest import mock
+
+from models import Lead, LeadManager, LeadTag, db
+from support import ModelTestCase
+
+
+class BulkUpdateTagsTestCase(ModelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = self.create_lead('first', tags=['a', 'b'])
+        self.second = self.create_lead('second', tags=['b'])
+
+    def tags_of(self, lead_id):
+        """(stored JSON tags, lead_tags rows) for a lead, which should always agree"""
+        db.session.expire_all()
+        rows = sorted(row.tag for row in LeadTag.query.filter_by(lead_id=lead_id))
+        return db.session.get(Lead, lead_id).tags_list, rows
+
+    def test_add_keeps_existing_tags_without_duplicates(self):
+        count = LeadManager.bulk_update_tags([self.first, self.second], ['b', 'c', 'c'], 'add', self.owner)
+        self.assertEqual(count, 2)
+        self.assertEqual(self.tags_of(self.first), (['a', 'b', 'c'], ['a', 'b', 'c']))
+        self.assertEqual(self.tags_of(self.second), (['b', 'c'], ['b', 'c']))
+
+    def test_remove(self):
+        LeadManager.bulk_update_tags([self.first, self.second], ['b'], 'remove', self.owner)
+        self.assertEqual(self.tags_of(self.first), (['a'], ['a']))
+        self.assertEqual(self.tags_of(self.second), ([], []))
+
+    def test_replace(self):
+        LeadManager.bulk_update_tags([self.first], ['z'], 'replace', self.owner)
+        self.assertEqual(self.tags_of(self.first), (['z'], ['z']))
+        self.assertEqual(self.tags_of(self.second), (['b'], ['b']))
+
+    def test_skips_leads_owned_by_another_user(self):
+        foreign = self.create_lead('foreign', self.other, tags=['x'])
+        count = LeadManager.bulk_update_tags([self.first, foreign], ['new'], 'add', self.owner)
+        self.assertEqual(count, 1)
+        self.assertEqual(self.tags_of(foreign), (['x'], ['x']))
+
+    def test_updates_across_id_batches(self):
+        lead_ids = [self.create_lead(f'lead{i}') for i in range(5)]
+        with mock.patch('models.DELETE_BATCH_SIZE', 2):
+            self.assertEqual(LeadManager.bulk_update_tags(lead_ids + [999], ['t'], 'add', self.owner), 5)
+        for lead_id in lead_ids:
+            self.assertEqual(self.tags_of(lead_id), (['t'], ['t']))
+
+    def test_refreshes_cached_tag_lists(self):
+        self.assertEqual(Lead.get_all_tags(self.owner), ['a', 'b'])
+        LeadManager.bulk_update_tags([self.first], ['c'], 'add', self.owner)
+        self.assertEqual(Lead.get_all_tags(self.owner), ['a', 'b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
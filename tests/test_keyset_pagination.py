@@ -0,0 +1,90 @@
+"""Tests for keyset (cursor) pagination of lead searches"""
+import base64
+import json
+import unittest
+from datetime import datetime
+
+from models import Lead, db
+from support import ModelTestCase
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+class KeysetPaginationTestCase(ModelTestCase):
+    def walk(self, page, order_by='engagement_score', limit=2, **filters):
+        """Follow next cursors from the first page to the last, collecting ids per page"""
+        pages, after = [], None
+        while True:
+            items, next_cursor = page(self.owner, after=after, limit=limit, order_by=order_by, **filters)
+            pages.append([item['id'] if isinstance(item, dict) else item.id for item in items])
+            if next_cursor is None:
+                return pages
+            after = Lead.decode_cursor(next_cursor, order_by)
+
+    def test_equal_sort_keys_are_split_by_id(self):
+        lead_ids = [self.create_lead(f'lead{i}', engagement_score=5.0) for i in range(5)]
+        expected = [sorted(lead_ids, reverse=True)[i:i + 2] for i in (0, 2, 4)]
+        self.assertEqual(self.walk(Lead.search_leads_page), expected)
+        self.assertEqual(self.walk(Lead.search_rows_page), expected)
+
+    def test_pages_follow_the_full_search_order(self):
+        for i, score in enumerate([3.0, 7.5, 3.0, 9.0, 7.5, 1.0, 3.0]):
+            self.create_lead(f'lead{i}', engagement_score=score, followers=i * 10)
+        self.create_lead('other_platform', platform='instagram', engagement_score=8.0)
+
+        for order_by in ('engagement_score', 'followers', 'created_at'):
+            leads, _ = Lead.search_leads(self.owner, platform='twitter', order_by=order_by)
+            pages = self.walk(Lead.search_leads_page, order_by, limit=3, platform='twitter')
+            self.assertEqual(sum(pages, []), [lead.id for lead in leads], order_by)
+
+    def test_last_page_has_no_cursor(self):
+        for i in range(4):
+            self.create_lead(f'lead{i}')
+        self.assertEqual([len(page) for page in self.walk(Lead.search_leads_page)], [2, 2])
+        self.assertEqual(Lead.search_leads_page(self.owner, limit=10)[1], None)
+        self.assertEqual(Lead.search_leads_page(self.other, limit=10), ([], None))
+
+    def test_cursor_round_trip(self):
+        lead_id = self.create_lead('dated', engagement_score=4.25)
+        lead = db.session.get(Lead, lead_id)
+        lead.created_at = datetime(2026, 1, 2, 3, 4, 5, 678)
+        db.session.commit()
+
+        self.assertEqual(Lead.decode_cursor(Lead.encode_cursor(lead)), (4.25, lead_id))
+        self.assertEqual(Lead.decode_cursor(Lead.encode_cursor(lead, 'created_at'), 'created_at'),
+                         (lead.created_at, lead_id))
+        after = Lead.decode_cursor(Lead.encode_cursor(lead, 'created_at'), 'created_at')
+        self.assertEqual(Lead.search_leads_page(self.owner, after=after, order_by='created_at'), ([], None))
+
+    def test_invalid_cursors_raise_value_error(self):
+        cases = [
+            ('', 'engagement_score'),
+            ('not a cursor!', 'engagement_score'),
+            (raw_cursor([1]), 'engagement_score'),
+            (raw_cursor([1, 2, 3]), 'engagement_score'),
+            (raw_cursor({'a': 1}), 'engagement_score'),
+            (raw_cursor([1, None]), 'engagement_score'),
+            (raw_cursor([1, 'x']), 'engagement_score'),
+            (raw_cursor([1, 1.5]), 'engagement_score'),
+            (raw_cursor([1, True]), 'engagement_score'),
+            (raw_cursor(['abc', 3]), 'engagement_score'),
+            (raw_cursor([[1], 3]), 'followers'),
+            (raw_cursor([2.5, 3]), 'followers'),
+            (raw_cursor([5, 3]), 'created_at'),
+            (raw_cursor(['yesterday', 3]), 'created_at'),
+            (raw_cursor([5, 3]), 'username'),
+        ]
+        for cursor, order_by in cases:
+            with self.subTest(cursor=cursor, order_by=order_by):
+                with self.assertRaises(ValueError):
+                    Lead.decode_cursor(cursor, order_by)
+
+        self.assertEqual(Lead.decode_cursor(raw_cursor(['2026-01-01T01:00:00', 3]), 'created_at'),
+                         (datetime(2026, 1, 1, 1), 3))
+        self.assertEqual(Lead.decode_cursor(raw_cursor(['abc', 3]), 'username'), ('abc', 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
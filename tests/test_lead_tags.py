@@ -0,0 +1,37 @@
+"""Tests for the lead_tags backfill"""
+import unittest
+
+from models import Lead, LeadTag, db
+from support import ModelTestCase
+
+
+class SyncTagRowsTestCase(ModelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tagged = self.create_lead('tagged', tags=['hot', 'tech'])
+        self.untagged = self.create_lead('untagged')
+        self.foreign = self.create_lead('foreign', self.other, tags=['cold'])
+
+        # Simulate leads stored before lead_tags existed
+        db.session.execute(LeadTag.__table__.delete())
+        db.session.commit()
+        Lead.invalidate_cache(self.owner, self.other)
+
+    def test_rebuilds_tag_rows_from_stored_tags(self):
+        self.assertEqual(Lead.get_all_tags(self.owner), [])
+
+        self.assertEqual(Lead.sync_tag_rows(), 3)
+
+        self.assertEqual(Lead.get_all_tags(self.owner), ['hot', 'tech'])
+        self.assertEqual(Lead.get_all_tags(self.other), ['cold'])
+        leads, total = Lead.search_leads(self.owner, tags='hot')
+        self.assertEqual(([lead.id for lead in leads], total), ([self.tagged], 1))
+
+    def test_is_idempotent(self):
+        Lead.sync_tag_rows()
+        Lead.sync_tag_rows()
+        self.assertEqual(LeadTag.query.count(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Tests that bulk-created leads match leads built through the ORM"""
+import unittest
+
+from flask import Flask
+
+from models import Lead, LeadManager, User, cache, db
+
+# Columns expected to differ between two otherwise identical leads
+VOLATILE_COLUMNS = {'id', 'username', 'created_at', 'last_updated'}
+
+
+class LeadValuesTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(app)
+        cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+        ctx = app.app_context()
+        ctx.push()
+        self.addCleanup(ctx.pop)
+
+        db.create_all()
+        self.addCleanup(db.drop_all)
+        self.addCleanup(db.session.remove)
+        user = User(username='owner', email='owner@example.com')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+
+    def assert_same_row(self, data):
+        orm_data = dict(data, user_id=self.user_id, username='orm_lead')
+        bulk_data = dict(data, user_id=self.user_id, username='bulk_lead')
+
+        # lead_values() should produce exactly the column values build_lead() ends up flushing
+        values = LeadManager.lead_values(bulk_data)
+        orm_lead = LeadManager.build_lead(orm_data)
+        db.session.add(orm_lead)
+        db.session.commit()
+        for column, value in values.items():
+            if column not in VOLATILE_COLUMNS:
+                self.assertEqual(value, getattr(orm_lead, column), column)
+
+        # ...and the stored rows, tag rows included, should match as well
+        LeadManager.create_leads_bulk([values])
+        bulk_lead = Lead.query.filter_by(username='bulk_lead').one()
+        for column in Lead.__table__.columns.keys():
+            if column not in VOLATILE_COLUMNS:
+                self.assertEqual(getattr(bulk_lead, column), getattr(orm_lead, column), column)
+        self.assertEqual(sorted(row.tag for row in bulk_lead.tag_rows),
+                         sorted(row.tag for row in orm_lead.tag_rows))
+
+    def test_minimal_lead(self):
+        self.assert_same_row({'platform': 'twitter'})
+
+    def test_lead_with_tags_and_tech_stack(self):
+        self.assert_same_row({
+            'platform': 'instagram',
+            'full_name': 'Jane Doe',
+            'followers': 1200,
+            'engagement_score': 4.5,
+            'tags': 'hot, tech, hot',
+            'tech_stack': ['python', 'go'],
+        })
+
+    def test_explicit_empty_tags(self):
+        self.assert_same_row({'platform': 'twitter', 'tags': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Tests for the cache-backed RateLimiter"""
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from models import cache
+from utils import RateLimiter
+
+# Start of an hour, so a 3600s window is fresh at the beginning of each test
+START = 1_800_000_000
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 30})
+        ctx = app.app_context()
+        ctx.push()
+        self.addCleanup(ctx.pop)
+
+        # Drive both the limiter's clock and SimpleCache's expiry clock
+        self.now = START
+        for target in ('time.time', 'cachelib.simple.time'):
+            patcher = mock.patch(target, side_effect=lambda: self.now)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.limiter = RateLimiter()
+
+    def hits(self, count, limit=3, window=3600):
+        return [self.limiter.is_allowed('client', limit, window) for _ in range(count)]
+
+    def test_limit_holds_past_the_default_cache_timeout(self):
+        self.assertEqual(self.hits(4), [True, True, True, False])
+        self.now += 31
+        self.assertEqual(self.hits(2), [False, False])
+        self.now += 1800
+        self.assertEqual(self.hits(1), [False])
+
+    def test_limit_resets_in_the_next_window(self):
+        self.assertEqual(self.hits(4), [True, True, True, False])
+        self.now = START + 3600
+        self.assertEqual(self.hits(4), [True, True, True, False])
+
+    def test_identifiers_are_counted_separately(self):
+        self.assertEqual(self.hits(3), [True, True, True])
+        self.assertTrue(self.limiter.is_allowed('other', 3, 3600))
+
+
+if __name__ == '__main__':
+    unittest.main()
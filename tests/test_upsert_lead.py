@@ -0,0 +1,65 @@
+"""Tests for LeadManager.upsert_lead and create_lead_if_absent"""
+import unittest
+from unittest import mock
+
+from models import Lead, LeadManager, LeadTag, db
+from support import ModelTestCase
+
+UPDATE_FIELDS = ('bio', 'website')
+
+
+class UpsertLeadTestCase(ModelTestCase):
+    def visit(self, user_id=None, **fields):
+        data = dict({'user_id': user_id or self.owner, 'username': 'visitor_1.2.3.4_1',
+                     'platform': 'website_visit', 'bio': 'first', 'website': 'https://a.example',
+                     'followers': 5, 'tags': ['website_visitor']}, **fields)
+        return LeadManager.upsert_lead(data, UPDATE_FIELDS)
+
+    def check_upsert(self):
+        lead_id, created = self.visit()
+        self.assertTrue(created)
+        created_at = db.session.get(Lead, lead_id).created_at
+
+        same_id, created = self.visit(bio='second', website='https://b.example', followers=99)
+        self.assertEqual((same_id, created), (lead_id, False))
+
+        db.session.expire_all()
+        lead = db.session.get(Lead, lead_id)
+        self.assertEqual((lead.bio, lead.website), ('second', 'https://b.example'))
+        # Fields outside update_fields and the creation time are kept
+        self.assertEqual(lead.followers, 5)
+        self.assertEqual(lead.created_at, created_at)
+        self.assertEqual([row.tag for row in LeadTag.query.filter_by(lead_id=lead_id)], ['website_visitor'])
+
+        # The same username belongs to a separate lead for another user
+        other_id, created = self.visit(self.other)
+        self.assertTrue(created)
+        self.assertNotEqual(other_id, lead_id)
+        self.assertEqual(Lead.query.count(), 2)
+
+    def test_upsert_with_on_conflict(self):
+        self.assertIsNotNone(LeadManager._conflict_insert())
+        self.check_upsert()
+
+    def test_upsert_without_on_conflict_support(self):
+        with mock.patch.object(LeadManager, '_conflict_insert', return_value=None):
+            self.check_upsert()
+
+    def test_upsert_refreshes_cached_statistics(self):
+        self.assertEqual(Lead.get_statistics(self.owner)['total_leads'], 0)
+        self.visit()
+        self.assertEqual(Lead.get_statistics(self.owner)['total_leads'], 1)
+
+    def test_create_lead_if_absent(self):
+        data = {'user_id': self.owner, 'username': 'jane', 'platform': 'twitter', 'tags': ['a']}
+        lead_id = LeadManager.create_lead_if_absent(data)
+        self.assertIsNotNone(lead_id)
+        self.assertIsNone(LeadManager.create_lead_if_absent(dict(data, bio='changed')))
+        self.assertIsNone(db.session.get(Lead, lead_id).bio)
+        with mock.patch.object(LeadManager, '_conflict_insert', return_value=None):
+            self.assertIsNone(LeadManager.create_lead_if_absent(data))
+        self.assertEqual(Lead.query.count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
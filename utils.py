@@ -3,62 +3,132 @@
 import csv
 import json
 import io
+import os
+import ijson
+import orjson
 from datetime import datetime
-from functools import wraps
+from functools import lru_cache, wraps
+from itertools import islice
+from operator import attrgetter
+from urllib.parse import urlsplit
 from flask import jsonify, request, current_app
+from flask_caching.backends import RedisCache
+from flask.json.provider import DefaultJSONProvider
 import re
-from models import APIKey, User, db
+import threading
+import time
+from models import APIKey, User, cache, db
+from werkzeug.datastructures import MultiDict
 from werkzeug.security import check_password_hash
 
+# Precompiled patterns used by the validation/sanitizing helpers
+# Domain labels can't contain '.', so each label ends at exactly one place and matching never backtracks
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}$')
+_WHITESPACE_RE = re.compile(r'\s')
+_HTML_TAG_RE = re.compile(r'<[^>]*>')
+_SCRIPT_RE = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+# ASCII bytes secure_filename deletes: everything except letters, digits, '.', '_' and '-'
+_FILENAME_DELETE_BYTES = bytes(c for c in range(128) if not (chr(c).isalnum() or chr(c) in '._-'))
+
 # ============================================================================
 # Export Functions
 # ============================================================================
 
-def export_leads_to_csv(leads):
+CSV_EXPORT_HEADER = [
+    'ID', 'Username', 'Platform', 'Full Name', 'Bio', 'Followers',
+    'Email', 'Website', 'Location', 'Profile URL', 'Engagement Score',
+    'Tags', 'Created At', 'Last Updated'
+]
+
+
+# Rows handed to csv.writer.writerows at a time when streaming an export
+CSV_EXPORT_CHUNK_ROWS = 500
+
+_lead_csv_fields = attrgetter(
+    'id', 'username', 'platform', 'full_name', 'bio', 'followers', 'email', 'website',
+    'location', 'profile_url', 'engagement_score', 'tags_list', 'created_at', 'last_updated'
+)
+
+
+def _lead_csv_row(lead):
+    """Build a single CSV export row for a lead"""
+    (lead_id, username, platform, full_name, bio, followers, email, website,
+     location, profile_url, engagement_score, tags, created_at, last_updated) = _lead_csv_fields(lead)
+    return (
+        lead_id,
+        username,
+        platform,
+        full_name or '',
+        bio or '',
+        followers,
+        email or '',
+        website or '',
+        location or '',
+        profile_url or '',
+        engagement_score,
+        ', '.join(tags),
+        created_at.isoformat(' ', 'seconds') if created_at else '',
+        last_updated.isoformat(' ', 'seconds') if last_updated else ''
+    )
+
+
+def export_leads_to_csv(leads, output=None):
     """
-    Export leads to CSV format
-    Returns: StringIO object containing CSV data
+    Export leads to CSV format, encoding straight into a bytes buffer
+    Returns: BytesIO object containing UTF-8 CSV data, ready for send_file
     """
-    output = io.StringIO()
-    writer = csv.writer(output)
+    output = output if output is not None else io.BytesIO()
+    text_output = io.TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text_output)
     
     # Write header
-    writer.writerow([
-        'ID', 'Username', 'Platform', 'Full Name', 'Bio', 'Followers',
-        'Email', 'Website', 'Location', 'Profile URL', 'Engagement Score',
-        'Tags', 'Created At', 'Last Updated'
-    ])
+    writer.writerow(CSV_EXPORT_HEADER)
     
     # Write data
-    for lead in leads:
-        writer.writerow([
-            lead.id,
-            lead.username,
-            lead.platform,
-            lead.full_name or '',
-            lead.bio or '',
-            lead.followers,
-            lead.email or '',
-            lead.website or '',
-            lead.location or '',
-            lead.profile_url or '',
-            lead.engagement_score,
-            ', '.join(lead.tags_list),
-            lead.created_at.strftime('%Y-%m-%d %H:%M:%S') if lead.created_at else '',
-            lead.last_updated.strftime('%Y-%m-%d %H:%M:%S') if lead.last_updated else ''
-        ])
+    writer.writerows(map(_lead_csv_row, leads))
     
+    # Hand the buffer back without letting the wrapper close it
+    text_output.detach()
     output.seek(0)
     return output
 
 
+def iter_leads_csv(leads, chunk_rows=CSV_EXPORT_CHUNK_ROWS):
+    """
+    Export leads to CSV, chunk_rows rows at a time
+    Yields: CSV text chunks, suitable for a streaming response
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_EXPORT_HEADER)
+    
+    rows = map(_lead_csv_row, leads)
+    while True:
+        writer.writerows(islice(rows, chunk_rows))
+        chunk = buffer.getvalue()
+        if not chunk:
+            return
+        yield chunk
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
 def export_leads_to_json(leads):
     """
-    Export leads to JSON format
+    Export leads to JSON format, encoded with orjson
     Returns: JSON string
     """
     leads_data = [lead.to_dict() for lead in leads]
-    return json.dumps(leads_data, indent=2)
+    return orjson.dumps(leads_data, option=orjson.OPT_INDENT_2).decode('utf-8')
+
+
+def iter_leads_ndjson(leads):
+    """
+    Export leads as newline-delimited JSON, one object per lead
+    Yields: encoded lines, suitable for a streaming response
+    """
+    for lead in leads:
+        yield orjson.dumps(lead.to_dict(), option=orjson.OPT_APPEND_NEWLINE)
 
 
 # ============================================================================
@@ -69,56 +139,81 @@ def parse_csv_file(file_content):
     """
     Parse CSV file content and return list of lead dictionaries
     """
-    leads_data = []
-    
     # Decode if bytes
     if isinstance(file_content, bytes):
         file_content = file_content.decode('utf-8')
     
-    # Parse CSV
-    csv_reader = csv.DictReader(io.StringIO(file_content))
-
-    def _get_stripped_value(row_data, key, default=''):
-        return str(row_data.get(key, default)).strip()
-
-    for row in csv_reader:
-        if not row:  # Skip empty rows
-            continue
-
-        lead_data = {
-            'username': _get_stripped_value(row, 'username'),
-            'platform': _get_stripped_value(row, 'platform').lower(),
-            'full_name': _get_stripped_value(row, 'full_name') or None,
-            'bio': _get_stripped_value(row, 'bio') or None,
-            'followers': int(_get_stripped_value(row, 'followers', '0')) if _get_stripped_value(row, 'followers', '0').isdigit() else 0,
-            'email': _get_stripped_value(row, 'email') or None,
-            'website': _get_stripped_value(row, 'website') or None,
-            'location': _get_stripped_value(row, 'location') or None,
-            'profile_url': _get_stripped_value(row, 'profile_url') or None,
-            'engagement_score': float(_get_stripped_value(row, 'engagement_score', '0.0')) if _get_stripped_value(row, 'engagement_score', '0.0').replace('.', '', 1).isdigit() else 0.0,
-            'tags': _get_stripped_value(row, 'tags') or '[]',
-            'company_name': _get_stripped_value(row, 'company_name') or None,
-            'company_industry': _get_stripped_value(row, 'company_industry') or None,
-            'company_size': _get_stripped_value(row, 'company_size') or None,
-            'job_title': _get_stripped_value(row, 'job_title') or None,
-            'tech_stack': json.dumps([t.strip() for t in _get_stripped_value(row, 'tech_stack').split(',') if t.strip()]) if _get_stripped_value(row, 'tech_stack') else '[]'
-        }
-
-        if lead_data['username'] and lead_data['platform']:
-            leads_data.append(lead_data)
-    
-    return leads_data
+    return list(iter_csv_leads(io.StringIO(file_content)))
+
+
+def iter_csv_leads(file_obj):
+    """
+    Parse a CSV file object row by row
+    Yields: lead dictionaries, without holding the whole file in memory
+    """
+    # Uploads arrive as binary streams; decode them incrementally
+    is_binary = not isinstance(file_obj, io.TextIOBase)
+    text_stream = io.TextIOWrapper(file_obj, encoding='utf-8', newline='') if is_binary else file_obj
+    
+    try:
+        reader = csv.reader(text_stream)
+        header = next(reader, None)
+        if header is None:
+            return
+        
+        # Resolve each column's position once per file rather than zipping a dict for every row
+        columns = {name: index for index, name in enumerate(header)}
+        for row in reader:
+            if not row:  # Skip empty rows
+                continue
+            
+            lead_data = _csv_row_to_lead(row, columns)
+            if lead_data['username'] and lead_data['platform']:
+                yield lead_data
+    finally:
+        if is_binary:
+            text_stream.detach()  # Leave the caller's stream open
+
+
+def _csv_row_to_lead(row, columns):
+    """Map one CSV row (a list of cells) onto lead fields, using the header's column positions"""
+    width = len(row)
+    
+    def _get_stripped_value(key, default=''):
+        index = columns.get(key)
+        return row[index].strip() if index is not None and index < width else default
+    
+    # Fetch and strip each cell once, then convert
+    followers = _get_stripped_value('followers', '0')
+    engagement_score = _get_stripped_value('engagement_score', '0.0')
+    tech_stack = _get_stripped_value('tech_stack')
+    
+    return {
+        'username': _get_stripped_value('username'),
+        'platform': _get_stripped_value('platform').lower(),
+        'full_name': _get_stripped_value('full_name') or None,
+        'bio': _get_stripped_value('bio') or None,
+        'followers': int(followers) if followers.isdigit() else 0,
+        'email': _get_stripped_value('email') or None,
+        'website': _get_stripped_value('website') or None,
+        'location': _get_stripped_value('location') or None,
+        'profile_url': _get_stripped_value('profile_url') or None,
+        'engagement_score': float(engagement_score) if engagement_score.replace('.', '', 1).isdigit() else 0.0,
+        'tags': _get_stripped_value('tags') or '[]',
+        'company_name': _get_stripped_value('company_name') or None,
+        'company_industry': _get_stripped_value('company_industry') or None,
+        'company_size': _get_stripped_value('company_size') or None,
+        'job_title': _get_stripped_value('job_title') or None,
+        'tech_stack': json.dumps([t.strip() for t in tech_stack.split(',') if t.strip()]) if tech_stack else '[]'
+    }
 
 
 def parse_json_file(file_content):
     """
     Parse JSON file content and return list of lead dictionaries
     """
-    # Decode if bytes
-    if isinstance(file_content, bytes):
-        file_content = file_content.decode('utf-8')
-    
-    data = json.loads(file_content)
+    # orjson parses bytes directly, so there is no separate decode step
+    data = orjson.loads(file_content)
     
     # Handle both array and object with 'leads' key
     if isinstance(data, dict) and 'leads' in data:
@@ -130,26 +225,54 @@ def parse_json_file(file_content):
     return data
 
 
+def iter_json_leads(file_obj):
+    """
+    Parse a binary JSON file object incrementally
+    Yields: lead dictionaries from a top-level array or an object's 'leads' array
+    """
+    # Peek at the first significant byte to pick the array's location
+    start = file_obj.tell()
+    first = file_obj.read(64).lstrip()[:1]
+    file_obj.seek(start)
+    
+    if first == b'[':
+        prefix = 'item'
+    elif first == b'{':
+        prefix = 'leads.item'
+    else:
+        raise ValueError("JSON must contain an array of leads")
+    
+    for item in ijson.items(file_obj, prefix, use_float=True):
+        if isinstance(item, dict):
+            yield item
+
+
 # ============================================================================
 # Validation Functions
 # ============================================================================
 
+@lru_cache(maxsize=4096)
 def validate_email(email):
-    """Validate email format"""
+    """Validate email format; memoized, since imports repeat the same values"""
     if not email:
         return True  # Empty email is allowed
     
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.match(email) is not None
 
 
+@lru_cache(maxsize=4096)
 def validate_url(url):
-    """Validate URL format"""
+    """Validate URL format; memoized, since imports repeat the same values"""
     if not url:
         return True  # Empty URL is allowed
     
-    pattern = r'^https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)$'
-    return re.match(pattern, url) is not None
+    try:
+        parts = urlsplit(url)
+        parts.port  # Raises ValueError for a malformed port
+    except ValueError:
+        return False
+    
+    return parts.scheme in ('http', 'https') and bool(parts.hostname) and not _WHITESPACE_RE.search(url)
 
 
 def sanitize_input(text):
@@ -157,15 +280,50 @@ def sanitize_input(text):
     if not text:
         return text
     
-    # Remove potential HTML tags
-    text = re.sub(r'<[^>]*>', '', str(text))
+    text = str(text)
+    if '<' not in text:  # Plain text; nothing for either pattern to match
+        return text.strip()
+    
+    # Remove script blocks first, while their tags still mark where the body ends
+    text = _SCRIPT_RE.sub('', text)
     
-    # Remove potential script tags
-    text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
+    # Remove potential HTML tags
+    text = _HTML_TAG_RE.sub('', text)
     
     return text.strip()
 
 
+class JSONBodyError(Exception):
+    """Raised when a JSON request body fails validation"""
+    
+    def __init__(self, errors):
+        super().__init__('Invalid request body')
+        self.errors = errors
+
+
+def validate_json_body(form_class):
+    """
+    Validate the JSON request body against a WTForms form
+    Returns: (form, data); raises JSONBodyError with the field errors
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise JSONBodyError({'body': ['A JSON object is required']})
+    
+    # WTForms expects string form data; arrays become repeated values
+    formdata = MultiDict()
+    for key, value in data.items():
+        for item in (value if isinstance(value, list) else [value]):
+            if item is not None:
+                formdata.add(key, str(item))
+    
+    form = form_class(formdata=formdata, meta={'csrf': False})
+    if not form.validate():
+        raise JSONBodyError(form.errors)
+    
+    return form, data
+
+
 # ============================================================================
 # Data Processing Functions
 # ============================================================================
@@ -174,7 +332,9 @@ def format_number(num):
     """Format large numbers with commas"""
     if num is None:
         return '0'
-    return '{:,}'.format(int(num))
+    if isinstance(num, int):
+        return f'{num:,}'
+    return f'{int(num):,}'
 
 
 def format_percentage(value):
@@ -184,6 +344,19 @@ def format_percentage(value):
     return f'{value:.2f}%'
 
 
+_markdown_local = threading.local()
+
+
+def render_markdown(text):
+    """Render markdown to HTML, reusing a per-thread converter instance"""
+    converter = getattr(_markdown_local, 'converter', None)
+    if converter is None:
+        import markdown
+        converter = _markdown_local.converter = markdown.Markdown()
+    
+    return converter.reset().convert(text or '')
+
+
 def calculate_growth_percentage(current, previous):
     """Calculate percentage growth"""
     if previous == 0:
@@ -204,7 +377,10 @@ def truncate_text(text, max_length=100, suffix='...'):
 # Date/Time Functions
 # ============================================================================
 
-def format_datetime(dt, format='%Y-%m-%d %H:%M:%S'):
+DEFAULT_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_datetime(dt, format=DEFAULT_DATETIME_FORMAT):
     """Format datetime object to string"""
     if not dt:
         return ''
@@ -215,9 +391,29 @@ def format_datetime(dt, format='%Y-%m-%d %H:%M:%S'):
         except:
             return dt
     
+    # isoformat gives the same text for naive datetimes without parsing a format string
+    if format == DEFAULT_DATETIME_FORMAT and isinstance(dt, datetime) and dt.tzinfo is None:
+        return dt.isoformat(' ', 'seconds')
     return dt.strftime(format)
 
 
+# (upper bound in seconds, seconds per unit, unit name), checked in order
+_RELATIVE_TIME_UNITS = (
+    (3600, 60, 'minute'),
+    (86400, 3600, 'hour'),
+    (604800, 86400, 'day'),
+    (2592000, 604800, 'week'),
+    (31536000, 2592000, 'month'),
+    (float('inf'), 31536000, 'year'),
+)
+
+
+@lru_cache(maxsize=512)
+def _relative_time_label(count, unit):
+    """'N unit(s) ago', memoized since a page repeats the same few labels"""
+    return f'{count} {unit}{"s" if count != 1 else ""} ago'
+
+
 def format_relative_time(dt):
     """Format datetime as relative time (e.g., '2 hours ago')"""
     if not dt:
@@ -229,37 +425,34 @@ def format_relative_time(dt):
         except:
             return dt
     
-    now = datetime.utcnow()
-    diff = now - dt
-    
-    seconds = diff.total_seconds()
-    
+    seconds = int((datetime.utcnow() - dt).total_seconds())
     if seconds < 60:
         return 'just now'
-    elif seconds < 3600:
-        minutes = int(seconds / 60)
-        return f'{minutes} minute{"s" if minutes != 1 else ""} ago'
-    elif seconds < 86400:
-        hours = int(seconds / 3600)
-        return f'{hours} hour{"s" if hours != 1 else ""} ago'
-    elif seconds < 604800:
-        days = int(seconds / 86400)
-        return f'{days} day{"s" if days != 1 else ""} ago'
-    elif seconds < 2592000:
-        weeks = int(seconds / 604800)
-        return f'{weeks} week{"s" if weeks != 1 else ""} ago'
-    elif seconds < 31536000:
-        months = int(seconds / 2592000)
-        return f'{months} month{"s" if months != 1 else ""} ago'
-    else:
-        years = int(seconds / 31536000)
-        return f'{years} year{"s" if years != 1 else ""} ago'
+    
+    for limit, unit_seconds, unit in _RELATIVE_TIME_UNITS:
+        if seconds < limit:
+            return _relative_time_label(seconds // unit_seconds, unit)
 
 
 # ============================================================================
 # API Helper Functions
 # ============================================================================
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify/create_response encode in C"""
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_response(data=None, message=None, status=200, error=None):
     """Create standardized API response"""
     response = {
@@ -309,10 +502,10 @@ def paginate_results(query, page=1, per_page=20):
 # ============================================================================
 
 class RateLimiter:
-    """Simple in-memory rate limiter"""
+    """Fixed-window rate limiter keeping its counters in the app cache (shared across workers with RedisCache)"""
     
     def __init__(self):
-        self.requests = {}
+        self._lock = threading.Lock()
     
     def is_allowed(self, identifier, limit=100, window=3600):
         """
@@ -321,24 +514,24 @@ class RateLimiter:
         limit: Max requests per window
         window: Time window in seconds
         """
-        now = datetime.utcnow().timestamp()
-        
-        if identifier not in self.requests:
-            self.requests[identifier] = []
-        
-        # Remove old requests outside the window
-        self.requests[identifier] = [
-            req_time for req_time in self.requests[identifier]
-            if now - req_time < window
-        ]
+        now = int(time.time())
+        bucket = now // window
+        key = f'rate_limit:{identifier}:{window}:{bucket}'
         
-        # Check if limit exceeded
-        if len(self.requests[identifier]) >= limit:
-            return False
+        backend = cache.cache
+        if isinstance(backend, RedisCache):
+            # add() only creates the counter, with its expiry, on the window's first request;
+            # inc() is an atomic INCR that leaves that expiry alone
+            backend.add(key, 0, timeout=window)
+            return (backend.inc(key) or 0) <= limit
         
-        # Add current request
-        self.requests[identifier].append(now)
-        return True
+        # Other backends implement inc() as a get and a set with the default timeout, which
+        # would restart the counter's expiry on every hit; write it back with the time left
+        # in the window instead
+        with self._lock:
+            count = (backend.get(key) or 0) + 1
+            backend.set(key, count, timeout=(bucket + 1) * window - now)
+        return count <= limit
 
 
 # Global rate limiter instance
@@ -357,10 +550,11 @@ def require_api_key(f):
                 status=401
             )
         
-        # Validate the API key against the database
-        api_key_obj = APIKey.query.filter_by(key=api_key, is_active=True).first()
+        # Validate the API key, reusing recent lookups instead of querying on every call
+        entry = APIKey.lookup_cached(api_key)
+        api_user = User.get_cached(entry[0]) if entry else None
 
-        if not api_key_obj or (api_key_obj.expires_at and api_key_obj.expires_at < datetime.utcnow()):
+        if api_user is None or (entry[1] and entry[1] < datetime.utcnow()):
             return create_response(
                 error='Invalid or expired API key',
                 status=401
@@ -368,7 +562,7 @@ def require_api_key(f):
         
         # Attach the user associated with the API key to the request context
         # This allows routes to access current_user for API requests
-        request.api_user = api_key_obj.user
+        request.api_user = api_user
         
         return f(*args, **kwargs)
     
@@ -399,9 +593,9 @@ def require_rate_limit(limit=100, window=3600):
 # ============================================================================
 
 def allowed_file(filename, allowed_extensions):
-    """Check if file extension is allowed"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    """Check if file extension is allowed (allowed_extensions: lowercase, without the dot)"""
+    extension = os.path.splitext(filename)[1][1:].lower()
+    return bool(extension) and extension in allowed_extensions
 
 
 def secure_filename(filename):
@@ -409,7 +603,8 @@ def secure_filename(filename):
     # Remove path components
     filename = filename.split('/')[-1].split('\\')[-1]
     
-    # Remove potentially dangerous characters
-    filename = re.sub(r'[^a-zA-Z0-9._-]', '', filename)
+    # Remove potentially dangerous characters: non-ASCII is dropped by the encode,
+    # the rest of the disallowed set by a C-level byte delete
+    filename = filename.encode('ascii', 'ignore').translate(None, _FILENAME_DELETE_BYTES).decode('ascii')
     
     return filename or 'file'
\ No newline at end of file
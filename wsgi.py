@@ -0,0 +1,5 @@
+# wsgi.py - WSGI entry point for production servers
+
+# The app is built once at import time; with gunicorn's preload_app this
+# happens in the master process before workers are forked
+from app import app